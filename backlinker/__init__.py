@@ -1,5 +1,7 @@
 from .cli import cli
+from .vault import Vault
 
 __all__ = [
-    "cli"
+    "cli",
+    "Vault"
 ]
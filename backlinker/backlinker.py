@@ -5,29 +5,47 @@ writes to an output file and parses command line arguments
 from __future__ import print_function
 import sys
 import os
-import glob
+import hashlib
+import locale
+import logging
+import mmap
 import re
+import tempfile
+import threading
+import time
 import urllib.parse
-from itertools import groupby
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .cache import CACHE_DIR, ParseCache, content_digest
+from .graph import LinkIndex
+from .progress import Progress
+from .stats import NullStats, Stats
+
+logger = logging.getLogger(__name__)
 
 
 class Link(object):
 
+  __slots__ = ('title', 'sources', 'destination')
+
   def __init__(self, title):
-    self.title = title
+    self.title = sys.intern(title)
     self.sources = set()
     self.destination = None
 
   def as_soft_link(self):
-    is_alternate_title = self.title != self.destination.title
-    return f"[[{self.title}|{self.destination.title}]]" if is_alternate_title else f"[[{self.title}]]"
+    return soft_link(self.title, self.destination)
 
-  def as_link(self, title_override=None):
-    return f"[{title_override if title_override else self.title}]({urllib.parse.quote(os.path.basename(self.destination.path))})"
+  def as_link(self, title_override=None, from_path=None):
+    return markdown_link(title_override if title_override else self.title, self.destination, from_path)
 
   def as_regex(self):
     return re.compile(f'\\[\\[{re.escape(self.title)}(\\|.*?)?\\]\\]')
 
+  def as_rewritten(self, rewrite_as_links, from_path=None):
+    return rewritten_link(self.title, self.destination, rewrite_as_links, from_path)
+
   def update_aliases_in_notes(self):
     for source in self.sources:
       pattern = self.as_regex()
@@ -41,59 +59,339 @@ class Link(object):
       source.content = updated_content
 
 
+def soft_link(title, destination):
+  is_alternate_title = title != destination.title
+  return f"[[{title}|{destination.title}]]" if is_alternate_title else f"[[{title}]]"
+
+
+def relative_path(path, from_path):
+  """
+  Returns the note `path` relative to the folder of the note at `from_path`, both relative to the vault
+  """
+  folder = from_path.rpartition('/')[0]
+  if folder == '':
+    return path
+
+  folder_parts = folder.split('/')
+  parts = path.split('/')
+  common = 0
+  while common < len(folder_parts) and common < len(parts) - 1 and folder_parts[common] == parts[common]:
+    common += 1
+
+  return '/'.join(['..'] * (len(folder_parts) - common) + parts[common:])
+
+
+def markdown_link(text, destination, from_path=None):
+  # without a note to link from, only the file name is linked, as in a vault without folders
+  target = os.path.basename(destination.path) if from_path is None else relative_path(destination.path, from_path)
+  return f"[{text}]({urllib.parse.quote(target)})"
+
+
+def rewritten_link(title, destination, rewrite_as_links, from_path=None):
+  """
+  Renders a link to `title` leading to the note `destination`, as a link in the note at `from_path` is rewritten
+  """
+  if not rewrite_as_links:
+    return soft_link(title, destination)
+  return markdown_link("REDACTED" if destination.title == "REDACTED" else title, destination, from_path)
+
+
+# everything from this comment on was rendered by backlinker and is dropped when a note is loaded
+BACKLINKER_MARKER = "<!-- begin backlinker content -->"
+
+
+# compact, picklable form of a parsed Note passed back from worker processes
+NoteRecord = namedtuple('NoteRecord', ['path', 'title', 'other_titles', 'frontmatter', 'content', 'links'])
+
+
 class Note(object):
 
+  __slots__ = ('path', 'title', 'other_titles', 'frontmatter', '_content', '_tokens', '_links')
+
   def __init__(self, path):
     self.path = path
     self.other_titles = {}
     self.content = ""
     self.frontmatter = ""
 
+  @classmethod
+  def from_record(cls, record):
+    note = cls(record.path)
+    note.title = record.title
+    note.other_titles = record.other_titles
+    note.frontmatter = record.frontmatter
+    note.content = record.content
+    note._links = record.links
+    return note
+
+  @classmethod
+  def from_json_record(cls, path, values):
+    title, other_titles, frontmatter, content, links = values
+    # notes without an aka line hold an empty dict, which renders differently to the empty set of an aka line
+    # without links, so the two are stored as null and []
+    return cls.from_record(NoteRecord(path, title, {} if other_titles is None else set(other_titles), frontmatter,
+                                      content, set(links)))
+
+  def as_record(self):
+    return NoteRecord(self.path, self.title, self.other_titles, self.frontmatter, self.content, self.find_links())
+
+  def as_json_record(self):
+    other_titles = None if self.other_titles == {} else sorted(self.other_titles)
+    return [self.title, other_titles, self.frontmatter, self.content, sorted(self.find_links())]
+
+  @property
+  def content(self):
+    return self._content
+
+  @content.setter
+  def content(self, content):
+    # tokens and links found in the previous content are no longer valid
+    self._content = content
+    self._tokens = None
+    self._links = None
+
+  @property
+  def tokens(self):
+    if self._tokens is None:
+      self._tokens = Tokens(self._content)
+    return self._tokens
+
   def load(self, from_dir):
-    with open(os.path.join(from_dir, self.path), 'r') as f:
-      file_content = f.read()
+    _, _, frontmatter, content = read_note_file(os.path.join(from_dir, self.path))
 
-    start_of_backlinking_block = file_content.find("<!-- begin backlinker content -->")
-    if start_of_backlinking_block != -1:
-      file_content = file_content[:start_of_backlinking_block]
+    self.parse_parts(frontmatter, content)
 
-    file_content = file_content.split('---', 2)
+  def parse(self, file_content):
+    self.parse_parts(*split_note_text(file_content))
 
-    self.frontmatter = file_content[1].strip()
-    self.content = file_content[2].strip()
+  def parse_parts(self, frontmatter, content):
+    self.frontmatter = frontmatter.strip()
 
-    self._parse_titles_from_content()
+    self._parse_titles_from_content(content)
 
-  def as_link(self):
-    return f"[{self.title}]({urllib.parse.quote(os.path.basename(self.path))})"
+  def as_link(self, from_path=None):
+    target = os.path.basename(self.path) if from_path is None else relative_path(self.path, from_path)
+    return f"[{self.title}]({urllib.parse.quote(target)})"
 
-  def _parse_titles_from_content(self):
+  def _parse_titles_from_content(self, content):
     '''
-    Parses the `# Title` and `aka [[Other Titles]]` lines from the start of the content
+    Parses the `# Title` and `aka [[Other Titles]]` lines from the start of the stripped content, and keeps the
+    stripped content after them. Only offsets are taken until then, so a large content is copied just once
     '''
 
-    content_lines = self.content.split('\n')
+    start, end = _strip_bounds(content, 0, len(content))
+    lines = _line_spans(content, start, end, 5)
+
+    def line(i):
+      return content[lines[i][0]:lines[i][1]]
 
-    self.title = content_lines[0].replace('#', '').strip()
-    content_lines = content_lines[1:]
+    self.title = sys.intern(line(0).replace('#', '').strip())
 
     self.other_titles = {}
-    if len(content_lines) > 1 and content_lines[1].startswith('aka'):
-      self.other_titles = parse_links(content_lines[1])
-      content_lines = content_lines[2:]
-    elif len(content_lines) > 2 and content_lines[2].startswith('aka'):
-      self.other_titles = parse_links(content_lines[2])
-      content_lines = content_lines[3:]
+    keep = 1
+    if len(lines) > 2 and line(2).startswith('aka'):
+      self.other_titles = parse_links(line(2))
+      keep = 3
+    elif len(lines) > 3 and line(3).startswith('aka'):
+      self.other_titles = parse_links(line(3))
+      keep = 4
 
-    self.content = "\n".join(content_lines).strip()
+    start, end = _strip_bounds(content, lines[keep][0] if len(lines) > keep else end, end)
+    self.content = content[start:end]
 
   def find_links(self):
-    return parse_links(self.content)
+    if self._links is None:
+      self._links = set(link.title for link in self.tokens.links)
+    return self._links
+
+
+def split_note_text(file_content):
+  """
+  Returns the frontmatter and content of the text of a note file, dropping any rendered backlinks
+  """
+  start_of_backlinking_block = file_content.find(BACKLINKER_MARKER)
+  if start_of_backlinking_block != -1:
+    file_content = file_content[:start_of_backlinking_block]
+
+  file_content = file_content.split('---', 2)
+
+  return file_content[1], file_content[2]
+
+
+def _strip_bounds(text, start, end):
+  """
+  Returns the bounds of `text[start:end].strip()` in `text`, without copying it
+  """
+  while start < end and text[start].isspace():
+    start += 1
+  while end > start and text[end - 1].isspace():
+    end -= 1
+
+  return start, end
+
+
+def _line_spans(text, start, end, count):
+  """
+  Returns the `(start, end)` offsets of the first `count` lines of `text[start:end]`, as `split('\\n')` would find them
+  """
+  spans = []
+  while len(spans) < count:
+    newline = text.find('\n', start, end)
+    if newline == -1:
+      spans.append((start, end))
+      break
+
+    spans.append((start, newline))
+    start = newline + 1
+
+  return spans
+
+
+# notes of at least this many bytes are memory-mapped when loaded
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def _decode(view, encoding):
+  # decoded as a file opened in text mode would be, including its newline translation
+  text = str(view, encoding)
+  if '\r' in text:
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+  return text
+
+
+def _split_mapped_note(f, encoding, with_digest):
+  with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+    end = mapped.find(BACKLINKER_MARKER.encode(encoding))
+    if end == -1:
+      end = len(mapped)
+
+    first = mapped.find(b'---', 0, end)
+    second = mapped.find(b'---', first + 3, end) if first != -1 else -1
+    if second == -1:
+      raise IndexError(f'no frontmatter found in {f.name}')
+
+    frontmatter = _decode(view[first + 3:second], encoding)
+    content = _decode(view[second + 3:end], encoding)
+    digest = hashlib.sha1(mapped).hexdigest() if with_digest else None
+
+  return digest, frontmatter, content
+
+
+def read_note_file(path, with_digest=False):
+  """
+  Returns the size of the note file at `path`, the digest of its content when asked `with_digest`, and its
+  frontmatter and content as `split_note_text` would. Files of at least MMAP_THRESHOLD bytes are memory-mapped and
+  searched for the frontmatter and rendered backlinks as bytes, so that only the frontmatter and content are decoded
+  """
+  with open(path, 'r') as f:
+    size = os.fstat(f.fileno()).st_size
+
+    # ASCII compatible encodings only, so that the delimiters can be found as bytes
+    encoding = f.encoding
+    if size >= MMAP_THRESHOLD and '---'.encode(encoding) == b'---':
+      return (size, *_split_mapped_note(f, encoding, with_digest))
+
+    file_content = f.read()
+
+  digest = content_digest(file_content) if with_digest else None
+  return (size, digest, *split_note_text(file_content))
+
+
+WIKILINK_PATTERN = re.compile(r'\[\[(.*?)(?:\|(.*?))?\]\]')
+
+# a `<!-- label -->` comment, where the label may not itself open a comment
+MARKER_PATTERN = re.compile(r'<!-- ((?:(?!<!--).)*?) -->')
+
+Wikilink = namedtuple('Wikilink', ['start', 'end', 'title', 'alias'])
+Marker = namedtuple('Marker', ['start', 'end', 'label'])
+Section = namedtuple('Section', ['start', 'end', 'label'])
+
+
+class Tokens(object):
+  """
+  Note content scanned once into `[[Title|Alias]]` wikilink spans and `<!-- label -->` comment markers, with plain
+  text runs in between. Offsets index into `text`, content without `[[` or `<!--` is not scanned at all
+  """
+
+  __slots__ = ('text', 'links', 'markers')
+
+  def __init__(self, text):
+    self.text = text
+
+    self.links = []
+    if '[[' in text:
+      # titles are interned so that every mention of a title shares one string
+      self.links = [Wikilink(m.start(), m.end(), sys.intern(m.group(1)), m.group(2))
+                    for m in WIKILINK_PATTERN.finditer(text)]
+
+    self.markers = []
+    if '<!--' in text:
+      self.markers = [Marker(m.start(), m.end(), m.group(1)) for m in MARKER_PATTERN.finditer(text)]
+
+  def section_spans(self, labels):
+    """
+    Returns the spans of the sections labelled with any of `labels` in order. Markers are paired a label at a time, in
+    the order of `labels`, skipping markers inside the sections of earlier labels, as removing each label in turn
+    would. A section inside another is removed with it, and an unclosed marker only affects its own label
+    """
+    removed = [False] * len(self.markers)
+
+    spans = []
+    for label in labels:
+      end_label = f"End {label}"
+      opening = None
+      for i, marker in enumerate(self.markers):
+        if removed[i]:
+          continue
+        if opening is None:
+          if marker.label == label:
+            opening = i
+        elif marker.label == end_label:
+          spans.append(Section(self.markers[opening].start, marker.end, label))
+          removed[opening:i + 1] = [True] * (i + 1 - opening)
+          opening = None
+
+    merged = []
+    for span in sorted(spans):
+      if len(merged) == 0 or span.start >= merged[-1].end:
+        merged.append(span)
+
+    return merged
+
+  def rewrite(self, links_by_title, rewrite_as_links, from_path=None):
+    """
+    Returns the text with each wikilink whose title is a key of `links_by_title` rewritten, and the number rewritten.
+    Links are made relative to the note at `from_path`
+    """
+    pieces = []
+    position = 0
+    for link in self.links:
+      destination = links_by_title.get(link.title, None)
+      if destination is None:
+        continue
+
+      pieces.append(self.text[position:link.start])
+      pieces.append(destination.as_rewritten(rewrite_as_links, from_path))
+      position = link.end
+
+    if position == 0:
+      return self.text, 0
+
+    pieces.append(self.text[position:])
+    return "".join(pieces), (len(pieces) - 1) // 2
 
 
 def parse_links(text):
-  links = re.findall(r'\[\[(.*?)(?:\|(.*?))?\]\]', text)
-  return set(map(lambda link: link[0], links))
+  links = WIKILINK_PATTERN.findall(text)
+  return set(map(lambda link: sys.intern(link[0]), links))
+
+
+def rewrite_links_in_text(text, links_by_title, rewrite_as_links, from_path=None):
+  """
+  Rewrites each `[[Title|Alias]]` occurrence in `text` whose title is a key of `links_by_title` in a single scan,
+  leaving occurrences of any other title untouched. Links are made relative to the note at `from_path`
+  """
+  return Tokens(text).rewrite(links_by_title, rewrite_as_links, from_path)[0]
 
 
 def parse_sections(text, label):
@@ -115,119 +413,249 @@ def parse_sections(text, label):
   return list(map(lambda m: dict(start=m.start(), end=m.end(), content=m.group(1)), sections_iter))
 
 
+class Graph(namedtuple('Graph', ['notes', 'links'])):
+  """
+  The `notes` and `links` dicts built by `backlink`, which still unpack as a `(notes, links)` pair.
+  `aliases` maps each other title of a note that is linked to the Link for that title, `index` is the LinkIndex
+  the dicts were built from, if any, and `exclusion_report` the ExclusionReport of the notes excluded from them, if any
+  """
+
+  def __new__(cls, notes, links, aliases=None, index=None, exclusion_report=None):
+    graph = super().__new__(cls, notes, links)
+    graph.aliases = aliases if aliases is not None else index_aliases(notes, links)
+    graph.index = index
+    graph.exclusion_report = exclusion_report
+    return graph
+
+
+def index_aliases(notes, links):
+  aliases = dict()
+  for note in notes.values():
+    for other_title in note.other_titles:
+      if other_title in links:
+        aliases[other_title] = links[other_title]
+
+  return aliases
+
+
 def backlink(notes_list):
+  """
+  Builds the LinkIndex of `notes_list` and the `notes` and `links` dicts viewing it. Titles that are linked but have
+  no note get an empty placeholder note
+  """
 
   notes = dict()
   other_titles_mapping = dict()
-  links = dict()
-  for note in notes_list:
-    print(f'Backlinking {note.path}')
+  with Progress('Backlinking', len(notes_list)) as progress:
+    for note in notes_list:
+      logger.debug('Backlinking %s', note.path)
 
-    if note.title in notes:
-      raise ValueError(f'note title \'{note.title}\' occurs more than once')
-    notes[note.title] = note
+      if note.title in notes:
+        raise ValueError(f'note title \'{note.title}\' occurs more than once')
+      notes[note.title] = note
 
-    for other_title in note.other_titles:
-      if other_title in other_titles_mapping:
-        raise ValueError(f'note other title \'{note.title}\' occurs more than once')
-      other_titles_mapping[other_title] = note.title
+      for other_title in note.other_titles:
+        if other_title in other_titles_mapping:
+          raise ValueError(f'note other title \'{note.title}\' occurs more than once')
+        other_titles_mapping[other_title] = note.title
 
-    for link in note.find_links():
-      if link not in links:
-        links[link] = Link(link)
-      links[link].sources.add(note)
+      progress.update()
 
-  for title, note in notes.items():
+  index = LinkIndex(notes_list)
 
-    if note.title in links:
-      links[note.title].destination = note
+  links = dict()
+  for title_id, title in enumerate(index.titles):
+    sources = index.sources(title_id)
+    if len(sources) == 0:
+      continue
 
-    for other_title in note.other_titles:
-      if other_title in links:
-        links[other_title].destination = note
+    link = Link(title)
+    link.sources = set(map(index.notes.__getitem__, sources))
 
-  for title, link in links.items():
-    if link.destination is None:
+    destination_id = index.destinations[title_id]
+    if destination_id == -1:
       note = Note(f"{title}.md")
       note.title = title
-
-      link.destination = note
       notes[title] = note
+      link.destination = note
+    else:
+      link.destination = index.notes[destination_id]
 
-  return notes, links
+    links[title] = link
 
+  return Graph(notes, links, index=index)
 
-def create_index_note(notes):
 
-  if 'Index' in notes:
-    raise Exception("Unable to create index if note with title 'Index' exists")
+def freeze_links(links):
+  """
+  Replaces the `sources` set of each of `links` with a tuple sorted by title, which is smaller and already in the
+  order sources are rendered. Sources can no longer be added or removed afterwards
+  """
+  for link in links.values():
+    link.sources = tuple(sorted(link.sources, key=lambda note: note.title))
 
-  index = Note("Index.md")
-  index.title = "Index"
 
-  all_titles = set()
-  temporary_links = dict()
+def _index_titles(notes):
+  """
+  Returns the note each title and other title in `notes` leads to, and the titles grouped by their first letter
+  """
+  destinations = dict()
   for note in notes.values():
-    titles = set([note.title]).union(note.other_titles)
-    all_titles.update(titles)
-    for title in titles:
-      temporary_link = Link(title)
-      temporary_link.sources.add(index)
-      temporary_link.destination = note
-      temporary_links[title] = temporary_link
-
-  sorted_titles = sorted(list(all_titles))
-  letter_groupings = {}
-
-  for k, g in groupby(sorted_titles, key=lambda title: title[0].upper()):
-    if k in letter_groupings:
-      letter_groupings[k] += g
-    else:
-      letter_groupings[k] = list(g)
+    destinations[note.title] = note
+    for other_title in note.other_titles:
+      destinations[other_title] = note
+
+  letter_groupings = dict()
+  for title in sorted(destinations):
+    letter_groupings.setdefault(title[0].upper(), []).append(title)
+
+  return destinations, letter_groupings
 
-  content = ""
 
-  for letter in letter_groupings:
-    content += f"## {letter}\n\n"
-    for title in letter_groupings[letter]:
-      content += f"- [[{title}]]"
+def _index_section(letter, titles, notes, destinations, format_link):
+  entries = []
+  for title in titles:
+    entry = f"- {format_link(title, destinations[title])}"
 
-      # if this is an alias, render the true title after
-      if title not in notes:
-        content += f" _{temporary_links[title].destination.title}_"
+    # if this is an alias, render the true title after
+    if title not in notes:
+      entry += f" _{destinations[title].title}_"
 
-      content += '\n'
-    content += '\n'
+    entries.append(entry)
 
+  return f"## {letter}\n\n" + "".join(f"{entry}\n" for entry in entries) + "\n"
+
+
+def _check_index_title(notes, title):
+  if title in notes:
+    raise Exception(f"Unable to create index if note with title '{title}' exists")
+
+
+def _index_note(title, content):
+  index = Note(f"{title}.md")
+  index.title = title
   index.content = content
+  return index
+
+
+def create_index_note(notes):
+  """
+  Adds an `Index` note listing every title in `notes`, and returns a Link from the index for each title for
+  `render_links_in_content` to rewrite
+  """
+  _check_index_title(notes, "Index")
 
+  destinations, letter_groupings = _index_titles(notes)
+  content = "".join(_index_section(letter, titles, notes, destinations, lambda title, _: f"[[{title}]]")
+                    for letter, titles in letter_groupings.items())
+
+  index = _index_note("Index", content)
   notes["Index"] = index
 
-  return temporary_links.values()
+  temporary_links = []
+  for title, destination in destinations.items():
+    temporary_link = Link(title)
+    temporary_link.sources.add(index)
+    temporary_link.destination = destination
+    temporary_links.append(temporary_link)
+
+  return temporary_links
+
+
+def _shard_name(letter):
+  # the letter becomes part of a file name
+  return letter if letter.isalnum() else "#"
+
+
+def create_index_notes(notes, rewrite_as_links, shard=False):
+  """
+  Adds an `Index` note listing every title in `notes`, with its links already rendered as `rewrite_as_links` asks.
+  With `shard`, the titles of each letter are listed in an `Index - A` note instead, which `Index` links to.
+  Returns the notes added
+  """
+  _check_index_title(notes, "Index")
+
+  destinations, letter_groupings = _index_titles(notes)
+
+  def format_link(title, destination):
+    # the index notes are at the top of the vault
+    return rewritten_link(title, destination, rewrite_as_links, "Index.md")
+
+  if not shard:
+    content = "".join(_index_section(letter, titles, notes, destinations, format_link)
+                      for letter, titles in letter_groupings.items())
+    notes["Index"] = _index_note("Index", content)
+    return [notes["Index"]]
+
+  shard_titles = dict()
+  for letter, titles in letter_groupings.items():
+    shard_titles.setdefault(_shard_name(letter), []).append((letter, titles))
+
+  shards = []
+  for name, groupings in shard_titles.items():
+    _check_index_title(notes, f"Index - {name}")
+    content = "".join(_index_section(letter, titles, notes, destinations, format_link) for letter, titles in groupings)
+    shards.append(_index_note(f"Index - {name}", content))
+
+  index = _index_note("Index", "".join(f"- {format_link(shard.title, shard)}\n" for shard in shards))
 
+  for note in [index, *shards]:
+    notes[note.title] = note
+
+  return [index, *shards]
+
+
+# what `exclude_notes` removed: notes with an excluded title, the notes removed for linking to each excluded title,
+# links removed for having no sources left and the titles of links redirected to the REDACTED note
+ExclusionReport = namedtuple('ExclusionReport', ['excluded', 'referencing', 'removed_links', 'redacted'])
+
+
+def _outgoing_titles(note, index):
+  note_id = index.id_of(note.title)
+  if note_id == -1 or index.notes[note_id] is not note:
+    # placeholders and notes added after the index was built
+    return note.find_links()
+
+  return [index.titles[target_id] for target_id in index.targets(note_id)]
+
+
+def _link_for_update(links, title, copied):
+  # links are shared with the graph being excluded from, only the links that change are copied
+  if title not in copied:
+    original = links[title]
+    link = Link(original.title)
+    link.sources = set(original.sources)
+    link.destination = original.destination
+    links[title] = link
+    copied.add(title)
 
-def _remove_note_from_links(note, links):
+  return links[title]
+
+
+def _remove_note_from_links(note, links, index, copied, report):
   # remove the note from the sources of its links
-  for link_title in note.find_links():
+  for link_title in _outgoing_titles(note, index):
     if link_title in links:
-      link = links[link_title]
-      print(f'Unlinking excluded note source: {note.title} from {link.title}')
+      link = _link_for_update(links, link_title, copied)
+      logger.debug('Unlinking excluded note source: %s from %s', note.title, link.title)
       link.sources.remove(note)
 
       if len(link.sources) == 0:
-        print(f'Deleting empty link: {link_title}')
+        logger.debug('Deleting empty link: %s', link_title)
         del links[link_title]
+        report.removed_links.append(link_title)
 
 
-def _exclude_note_and_referencing_notes_by_title(notes, links, title):
+def _exclude_note_and_referencing_notes_by_title(notes, links, title, index, copied, report):
 
   excluded_referencing_note_titles = set()
 
   # delete any notes with excluded titles
   if title in notes:
-    print(f'Deleting excluded title: {title}')
-    _remove_note_from_links(notes[title], links)
+    logger.debug('Deleting excluded title: %s', title)
+    _remove_note_from_links(notes[title], links, index, copied, report)
     del notes[title]
+    report.excluded.append(title)
 
   # handle any link to excluded title
   if title in links:
@@ -235,117 +663,483 @@ def _exclude_note_and_referencing_notes_by_title(notes, links, title):
     # remove the link itself
     link_to_excluded_note = links[title]
     del links[title]
+    report.removed_links.append(title)
 
     # exclude any referencing notes and record the titles of the referencing note
-    for note in link_to_excluded_note.sources:
+    referencing = sorted(link_to_excluded_note.sources, key=lambda note: note.title)
+    for note in referencing:
       if note.title in notes:
-        print(f'Deleting note linked to excluded title: {note.title}')
+        logger.debug('Deleting note linked to excluded title: %s', note.title)
         del notes[note.title]
 
       excluded_referencing_note_titles.add(note.title)
       for other_title in note.other_titles:
         excluded_referencing_note_titles.add(other_title)
 
-      _remove_note_from_links(note, links)
+      _remove_note_from_links(note, links, index, copied, report)
+
+    report.referencing[title] = [note.title for note in referencing]
 
   return excluded_referencing_note_titles
 
 
-def _redact_links_to_excluded_notes(notes, links, link_titles_to_redact):
+def _redact_links_to_excluded_notes(notes, links, link_titles_to_redact, copied, report):
   redacted = Note("REDACTED.md")
   redacted.title = "REDACTED"
   redacted.content = "This content has been removed. Maybe it's a secret?"
 
-  did_redact_links = False
-  for title in link_titles_to_redact:
+  for title in sorted(link_titles_to_redact):
     if title in links:
-      print(f'Redacting links to: {title}')
-      links[title].destination = redacted
-      did_redact_links = True
+      logger.debug('Redacting links to: %s', title)
+      _link_for_update(links, title, copied).destination = redacted
+      report.redacted.append(title)
 
-  if did_redact_links:
+  if len(report.redacted) > 0:
     notes['REDACTED'] = redacted
 
 
-def exclude_notes(notes, links, titles_to_exclude):
+def _titles_within_depth(index, titles_to_exclude, depth):
+  titles = []
+  for note_id in index.backlinked_within(titles_to_exclude, None if depth is None else depth - 1):
+    note = index.notes[note_id]
+    titles.append(note.title)
+    titles.extend(sorted(note.other_titles))
+
+  return titles
+
+
+def exclude_notes(notes, links, titles_to_exclude, index=None, depth=1):
   """
   Excludes items from `notes` dict that have a link to any of the given `titles_to_exclude`.
   Does not consider aliases during exclusion, primary title must be passed.
+  With a `depth` above 1, notes linking to an excluded note, by its title or any other title, are excluded in turn
+  up to `depth` links away, and every link is followed when `depth` is None.
   Links to excluded notes are redirected to a REDACTED note.
+  The links of excluded notes are found in the LinkIndex `index` built by `backlink`, which is built here if not
+  given. The returned Graph holds an ExclusionReport as `exclusion_report`, the given notes and links are unchanged
   """
 
+  if index is None:
+    index = LinkIndex(list(notes.values()))
+
   filtered_notes = dict(notes)
   filtered_links = dict(links)
+  copied = set()
+  report = ExclusionReport([], dict(), [], [])
+
+  if depth is None or depth > 1:
+    # notes within depth - 1 links are excluded by title, so that the notes linking to them are excluded too
+    titles_to_exclude = [*titles_to_exclude, *_titles_within_depth(index, titles_to_exclude, depth)]
 
   excluded_referencing_note_titles = set()
 
   # iterate exclusion titles and remove directly referencing notes and links
   for title in titles_to_exclude:
     excluded_referencing_note_titles.update(_exclude_note_and_referencing_notes_by_title(
-        filtered_notes, filtered_links,  title))
+        filtered_notes, filtered_links, title, index, copied, report))
 
   # now replace links to deleted notes with link to REDACTED note
-  _redact_links_to_excluded_notes(filtered_notes, filtered_links, excluded_referencing_note_titles)
+  _redact_links_to_excluded_notes(filtered_notes, filtered_links, excluded_referencing_note_titles, copied, report)
 
-  return filtered_notes, filtered_links
+  return Graph(filtered_notes, filtered_links, exclusion_report=report)
 
 
-def _exclude_section_from_note(note, label):
+def _exclude_sections_from_note(note, labels, stats):
   """
-  Checks for sections with `label` in the note, omits the first occurrence, and the recurses
-  Recurrence is because the `start` and `end` of the following sections are not useful once the string has been modified. Simple to just look again
+  Omits every section with any of `labels` from the note in a single join, using the section spans found when the
+  content was tokenized
   """
 
-  sections = parse_sections(note.content, label)
-  if len(sections) > 0:
-    print(f'Excluding \'{label}\' section from {note.title} ({sections[0]["end"] - sections[0]["start"]} characters)')
-    note.content = note.content[:sections[0]['start']] + note.content[sections[0]['end']:]
-    _exclude_section_from_note(note, label)
+  spans = note.tokens.section_spans(labels)
+  if len(spans) == 0:
+    return
 
+  content = note.content
+  pieces = []
+  position = 0
+  for span in spans:
+    logger.debug('Excluding \'%s\' section from %s (%d characters)', span.label, note.title, span.end - span.start)
+    stats.count('sections_excluded')
+    pieces.append(content[position:span.start])
+    position = span.end
+  pieces.append(content[position:])
 
-def exclude_sections_from_notes(notes, exclusions):
-  for exclusion in exclusions:
-    for note in notes:
-      _exclude_section_from_note(note, exclusion)
+  note.content = "".join(pieces)
 
 
-def load_notes(input_dir):
-  input_paths = glob.glob(os.path.join(input_dir, "*.md"))
+def exclude_sections_from_notes(notes, exclusions, stats=None):
+  stats = stats or NullStats()
+  # sections are removed a label at a time, in the order given
+  labels = list(dict.fromkeys(exclusions))
+  if len(labels) == 0:
+    return
 
-  notes = list()
+  for note in notes:
+    _exclude_sections_from_note(note, labels, stats)
+
+
+def output_folder(input_dir, output_dir):
+  """
+  Returns the path of `output_dir` relative to `input_dir` when it is a folder inside it, otherwise None
+  """
+  if output_dir is None:
+    return None
+
+  relative = os.path.relpath(os.path.realpath(output_dir), os.path.realpath(input_dir))
+  if relative == os.curdir or relative == os.pardir or relative.startswith(os.pardir + os.sep):
+    return None
+
+  return relative.replace(os.sep, '/')
+
+
+def _scan_folder(input_dir, folder, skipped):
+  """
+  Returns the `(path, stat)` of each note directly inside `folder` of `input_dir`, and the paths of its subfolders
+  other than `skipped`
+  """
+  found = []
+  subfolders = []
+  with os.scandir(os.path.join(input_dir, folder)) as entries:
+    for entry in entries:
+      if entry.name.startswith('.'):
+        continue
+
+      path = entry.name if folder == '' else f"{folder}/{entry.name}"
+      if entry.is_dir(follow_symlinks=False):
+        if path != skipped:
+          subfolders.append(path)
+      elif entry.name.endswith('.md') and entry.is_file():
+        found.append((path, entry.stat()))
+
+  return found, subfolders
+
+
+def discover_notes(input_dir, jobs=1, output_dir=None):
+  """
+  Finds every `*.md` note in `input_dir` and its folders, scanning folders on `jobs` threads. Hidden files and folders
+  are skipped, as are links to folders and `output_dir` when it is inside `input_dir`, so rendered notes are not read
+  back as notes. Returns `(path, stat)` pairs sorted by path, where each path is relative to `input_dir` with `/`
+  separators
+  """
+  skipped = output_folder(input_dir, output_dir)
+  found = []
+  if jobs > 1:
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='backlinker-scan') as executor:
+      pending = {executor.submit(_scan_folder, input_dir, '', skipped)}
+      while len(pending) > 0:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          notes, subfolders = future.result()
+          found.extend(notes)
+          pending.update(executor.submit(_scan_folder, input_dir, subfolder, skipped) for subfolder in subfolders)
+  else:
+    folders = ['']
+    while len(folders) > 0:
+      notes, subfolders = _scan_folder(input_dir, folders.pop(), skipped)
+      found.extend(notes)
+      folders.extend(subfolders)
 
-  for path in input_paths:
-    print(f'Loading {path}')
-    note = Note(os.path.basename(path))
-    note.load(input_dir)
+  found.sort(key=lambda item: item[0])
+  return found
 
-    notes.append(note)
+
+def _load_note_with_cache(input_dir, path, stat, cache, stats):
+  full_path = os.path.join(input_dir, path)
+
+  cached = cache.get(path, stat)
+  if cached is not None:
+    return Note.from_json_record(path, cached)
+
+  size, digest, frontmatter, content = read_note_file(full_path, with_digest=True)
+  stats.count('files_read')
+  stats.count('bytes_read', size)
+
+  cached = cache.get(path, stat, digest)
+  if cached is not None:
+    return Note.from_json_record(path, cached)
+
+  note = Note(path)
+  note.parse_parts(frontmatter, content)
+  cache.put(path, stat, digest, note.as_json_record())
+
+  return note
+
+
+def _load_note(input_dir, path, stat, throughput, cache, stats):
+  started = time.perf_counter()
+
+  logger.debug('Loading %s', path)
+  if cache is None:
+    size, _, frontmatter, content = read_note_file(os.path.join(input_dir, path))
+    stats.count('files_read')
+    stats.count('bytes_read', size)
+
+    note = Note(path)
+    note.parse_parts(frontmatter, content)
+  else:
+    note = _load_note_with_cache(input_dir, path, stat, cache, stats)
+
+  worker = threading.current_thread().name
+  count, seconds = throughput.get(worker, (0, 0.0))
+  throughput[worker] = (count + 1, seconds + time.perf_counter() - started)
+
+  return note
+
+
+def _log_throughput(throughput):
+  for worker, (count, seconds) in sorted(throughput.items()):
+    rate = count / seconds if seconds > 0 else float('inf')
+    logger.info('%s: loaded %d notes in %.2fs (%.0f notes/s)', worker, count, seconds, rate)
+
+
+def load_notes(input_dir, jobs=1, cache=None, stats=None, output_dir=None):
+  """
+  Loads every `*.md` note in `input_dir` and its folders, other than those in `output_dir`. With `jobs` greater than
+  1 the notes are read and parsed on a pool of `jobs` threads. Notes are always returned in sorted path order so that
+  output does not depend on scheduling. Notes found unchanged in the `cache` are not parsed again
+  """
+  discovered = discover_notes(input_dir, jobs, output_dir)
+  stats = stats or NullStats()
+
+  # each worker thread only ever updates its own entry
+  throughput = dict()
+
+  with Progress('Loading', len(discovered)) as progress:
+
+    def load(discovered_note):
+      path, stat = discovered_note
+      note = _load_note(input_dir, path, stat, throughput, cache, stats)
+      progress.update()
+      return note
+
+    if jobs > 1:
+      with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='backlinker-load') as executor:
+        notes = list(executor.map(load, discovered))
+      _log_throughput(throughput)
+    else:
+      notes = [load(discovered_note) for discovered_note in discovered]
 
   return notes
 
 
-def render_notes(notes, links, rewrite_as_links, render_frontmatter):
+def _parse_note_batch(input_dir, paths, exclusions, with_loaded=False):
+  """
+  Worker process entry point: loads each note, excludes labelled sections and extracts its links.
+  Returns a `(size, digest, loaded, parsed)` tuple per note, where the digest and the record of the note as it was
+  loaded are only filled in `with_loaded`, for the parse cache
+  """
+  results = []
+  for path in paths:
+    logger.debug('Loading %s', path)
+    size, digest, frontmatter, content = read_note_file(os.path.join(input_dir, path), with_digest=with_loaded)
+
+    note = Note(path)
+    note.parse_parts(frontmatter, content)
+
+    loaded = note.as_json_record() if with_loaded else None
+
+    exclude_sections_from_notes([note], exclusions)
+
+    results.append((size, digest, loaded, note.as_record()))
+
+  return results
+
+
+def parse_notes(input_dir, exclusions, jobs, batch_size=None, cache=None, stats=None, output_dir=None):
+  """
+  Loads every `*.md` note in `input_dir` and its folders, other than those in `output_dir`, on a pool of `jobs`
+  worker processes, which also exclude `exclusions` sections and extract links so that only graph assembly is left to
+  the calling process. Notes found unchanged in the `cache` are not sent to the workers. Notes are returned in sorted
+  path order
+  """
+  discovered = discover_notes(input_dir, jobs, output_dir)
+  input_paths = [path for path, _ in discovered]
+  file_stats = [stat for _, stat in discovered]
+  stats = stats or NullStats()
+
+  notes = [None] * len(input_paths)
+  misses = []
+  for i, path in enumerate(input_paths):
+    if cache is not None:
+      cached = cache.get(path, file_stats[i])
+      if cached is not None:
+        logger.debug('Loading %s', path)
+        notes[i] = Note.from_json_record(path, cached)
+        exclude_sections_from_notes([notes[i]], exclusions, stats)
+        continue
+
+    misses.append(i)
+
+  if len(misses) == 0:
+    return notes
+
+  if batch_size is None:
+    # a few batches per worker evens out differences in note size
+    batch_size = max(1, -(-len(misses) // (jobs * 4)))
+
+  batches = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+  batch_paths = [[input_paths[i] for i in batch] for batch in batches]
+
+  with ProcessPoolExecutor(max_workers=jobs) as executor, Progress('Loading', len(misses)) as progress:
+    batch_results = executor.map(_parse_note_batch, [input_dir] * len(batches), batch_paths,
+                                 [exclusions] * len(batches), [cache is not None] * len(batches))
+
+    for batch, results in zip(batches, batch_results):
+      for i, (size, digest, loaded, parsed) in zip(batch, results):
+        stats.count('files_read')
+        stats.count('bytes_read', size)
+        notes[i] = Note.from_record(parsed)
+        if cache is not None:
+          cache.put(parsed.path, file_stats[i], digest, loaded)
+
+      progress.update(len(batch))
+
+  return notes
+
+
+def render_notes(notes, links, rewrite_as_links, render_frontmatter, aliases=None):
+
+  if aliases is None:
+    aliases = index_aliases(notes, links)
 
   rendered_notes = dict()
-  for title, note in notes.items():
-    link = links.get(title, None)
-    other_title_links = list(
-        filter(lambda link: link.title in note.other_titles, list(links.values())))
+  with Progress('Rendering', len(notes)) as progress:
+    for title, note in notes.items():
+      link = links.get(title, None)
+      other_title_links = [aliases[other_title] for other_title in note.other_titles if other_title in aliases]
 
-    rendered = render_note(note, link, other_title_links, rewrite_as_links, render_frontmatter)
-    rendered_notes[note.path] = rendered
+      rendered = render_note(note, link, other_title_links, rewrite_as_links, render_frontmatter)
+      rendered_notes[note.path] = rendered
+      progress.update()
 
   return rendered_notes
 
 
-def output_notes(rendered_notes, output_dir):
+def _encode_rendered(rendered):
+  """
+  Encodes `rendered` to the bytes a text mode `open(..., 'w')` would write
+  """
+  if os.linesep != '\n':
+    rendered = rendered.replace('\n', os.linesep)
+  return rendered.encode(locale.getpreferredencoding(False))
+
+
+def _is_unchanged(output_path, encoded):
+  try:
+    if os.path.getsize(output_path) != len(encoded):
+      return False
+
+    with open(output_path, 'rb') as f:
+      existing = f.read()
+  except FileNotFoundError:
+    return False
+
+  return hashlib.sha1(existing).digest() == hashlib.sha1(encoded).digest()
+
+
+def _default_file_mode():
+  # the umask can only be read by setting it
+  umask = os.umask(0)
+  os.umask(umask)
+  return 0o666 & ~umask
+
 
-  for path, rendered in rendered_notes.items():
+def _fsync_directory(directory):
+  if not hasattr(os, 'O_DIRECTORY'):
+    return
 
+  fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+  try:
+    os.fsync(fd)
+  finally:
+    os.close(fd)
+
+
+def _write_atomically(output_path, encoded, mode, fsync):
+  """
+  Writes `encoded` to a temporary file next to `output_path` and renames it into place, so that readers and
+  interrupted runs only ever see the old or the new content
+  """
+  directory, filename = os.path.split(output_path)
+  fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f'.{filename}.', suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(encoded)
+      if fsync:
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, output_path)
+  except BaseException:
+    os.unlink(temp_path)
+    raise
+
+
+def _output_batch(batch, output_dir, default_mode, fsync, stats):
+  written = skipped = new = 0
+  touched_dirs = set()
+  for path, rendered in batch:
     output_path = os.path.join(output_dir, path)
+    if os.path.islink(output_path):
+      # a note linked from elsewhere is written through the link, replacing the link would leave its target stale
+      output_path = os.path.realpath(output_path)
+    encoded = _encode_rendered(rendered)
+
+    if _is_unchanged(output_path, encoded):
+      skipped += 1
+      continue
+
+    try:
+      mode = os.stat(output_path).st_mode & 0o7777
+      written += 1
+    except FileNotFoundError:
+      mode = default_mode
+      new += 1
+      # notes in folders may be the first written to their folder
+      os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    _write_atomically(output_path, encoded, mode, fsync)
+    stats.count('bytes_written', len(encoded))
+    touched_dirs.add(os.path.dirname(output_path))
+
+  # one sync per directory and batch makes the renames in them durable
+  if fsync:
+    for directory in sorted(touched_dirs):
+      _fsync_directory(directory)
+
+  return written, skipped, new
+
+
+def output_notes(rendered_notes, output_dir, jobs=1, fsync=False, batch_size=64, stats=None):
+  """
+  Writes each rendered note under `output_dir`, skipping files whose content would not change. Files are replaced
+  atomically, in batches of `batch_size` spread over `jobs` threads, and with `fsync` are flushed to disk per batch.
+  Returns counts of the files `written`, `skipped` and `new`
+  """
+  items = list(rendered_notes.items())
+  batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+  default_mode = _default_file_mode()
+  stats = stats or NullStats()
+
+  with Progress('Writing', len(items)) as progress:
+
+    def output(batch):
+      counts = _output_batch(batch, output_dir, default_mode, fsync, stats)
+      progress.update(len(batch))
+      return counts
+
+    if jobs > 1:
+      with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='backlinker-output') as executor:
+        counts = list(executor.map(output, batches))
+    else:
+      counts = [output(batch) for batch in batches]
+
+  written, skipped, new = (sum(count[i] for count in counts) for i in range(3))
 
-    with open(output_path, 'w') as f:
-      f.write(rendered)
+  logger.info('Output: %d written, %d unchanged, %d new', written, skipped, new)
+  stats.count('files_written', written + new)
+
+  return dict(written=written, skipped=skipped, new=new)
 
 
 def render_note(note, link, other_title_links, rewrite_as_links, render_frontmatter):
@@ -391,7 +1185,7 @@ def render_note_backlinks(note, link, other_title_links, rewrite_as_links):
     sorted_sources.sort(key=lambda note: note.title)
     rendered += "\n"
     for source in sorted_sources:
-      rendered += ("- " + source.as_link()) if rewrite_as_links else f"[[{source.title}]]"
+      rendered += ("- " + source.as_link(note.path)) if rewrite_as_links else f"[[{source.title}]]"
       rendered += "\n"
 
   other_title_links.sort(key=lambda link: link.title)
@@ -401,52 +1195,131 @@ def render_note_backlinks(note, link, other_title_links, rewrite_as_links):
     sorted_sources.sort(key=lambda note: note.title)
     for source in sorted_sources:
       rendered += "\n"
-      rendered += ("- " + source.as_link()) if rewrite_as_links else f"[[{source.title}]]"
+      rendered += ("- " + source.as_link(note.path)) if rewrite_as_links else f"[[{source.title}]]"
     rendered += "\n"
 
   return rendered
 
 
-def render_links_in_content(links, rewrite_as_links):
+def render_links_in_content(links, rewrite_as_links, stats=None):
+  """
+  Rewrites occurrences of `links` in the content of their sources, scanning the content of each source only once
+  """
+  stats = stats or NullStats()
+
+  links_by_source = dict()
   for link in links:
-    if rewrite_as_links:
-      if link.destination.title == "REDACTED":
-        link.rewrite_in_notes("REDACTED")
-      else:
-        link.rewrite_in_notes()
-    else:
-      link.update_aliases_in_notes()
+    for source in link.sources:
+      links_by_source.setdefault(source, dict())[link.title] = link
 
+  with Progress('Rewriting links', len(links_by_source)) as progress:
+    for source, source_links in links_by_source.items():
+      source.content, rewritten = source.tokens.rewrite(source_links, rewrite_as_links, source.path)
+      stats.count('regex_substitutions', rewritten)
+      progress.update()
 
-def run_backlinker(parameters):
 
+def load_notes_from_parameters(parameters, stats=None):
+  """
+  Loads the notes in the `input` directory with any `exclude` sections removed, as set up by `parameters`
+  """
   exclusions = parameters['exclude']
   input_dir = parameters['input']
-  output_dir = parameters['output']
+  output_dir = parameters.get('output', None)
+  jobs = parameters.get('jobs', 1)
+  processes = parameters.get('processes', False)
+  stats = stats or NullStats()
+
+  cache = None
+  if parameters.get('cache', False):
+    cache = ParseCache.open(parameters.get('cache_dir', None) or os.path.join(input_dir, CACHE_DIR))
+
+  if processes:
+    with stats.stage('load'):
+      notes_list = parse_notes(input_dir, exclusions, jobs, cache=cache, stats=stats, output_dir=output_dir)
+  else:
+    with stats.stage('load'):
+      notes_list = load_notes(input_dir, jobs, cache, stats, output_dir)
+
+    if len(exclusions) > 0:
+      with stats.stage('exclude_sections'):
+        exclude_sections_from_notes(notes_list, exclusions, stats)
+
+  if cache is not None:
+    logger.info('Parse cache: %d of %d notes unchanged', cache.hits, len(notes_list))
+    stats.set('cache_hits', cache.hits)
+    cache.save()
+
+  stats.set('notes', len(notes_list))
+  stats.set('aliases', sum(len(note.other_titles) for note in notes_list))
+
+  return notes_list
+
+
+def render_backlinked_notes(notes_list, parameters, stats=None):
+  """
+  Backlinks, excludes, rewrites and renders `notes_list`, returning the rendered notes keyed by path.
+  The content of the notes is rewritten in the process
+  """
+  exclusions = parameters['exclude']
   render_frontmatter = parameters['render_frontmatter']
   render_index = parameters['render_index']
   rewrite_as_links = parameters['rewrite_as_links']
+  stats = stats or NullStats()
 
-  notes_list = load_notes(input_dir)
+  with stats.stage('backlink'):
+    graph = backlink(notes_list)
+  stats.set('links', len(graph.links))
 
   if len(exclusions) > 0:
-    exclude_sections_from_notes(notes_list, exclusions)
+    number_of_notes_before_excluding = len(graph.notes)
+    number_of_links_before_excluding = len(graph.links)
+    with stats.stage('exclude_notes'):
+      graph = exclude_notes(graph.notes, graph.links, exclusions, graph.index, parameters.get('exclude_depth', 1))
+    logger.info('Excluded %d notes (%d links)', number_of_notes_before_excluding - len(graph.notes),
+                number_of_links_before_excluding - len(graph.links))
+    for title, referencing in graph.exclusion_report.referencing.items():
+      logger.debug('Excluded %d notes linking to %s: %s', len(referencing), title, ', '.join(referencing))
+    stats.set('redactions', len(graph.exclusion_report.redacted))
+
+  notes, links = graph
+  freeze_links(links)
+
+  with stats.stage('rewrite_links'):
+    render_links_in_content(links.values(), rewrite_as_links, stats)
 
-  notes, links = backlink(notes_list)
+  if render_index:
+    with stats.stage('create_index'):
+      create_index_notes(notes, rewrite_as_links, parameters.get('shard_index', False))
 
-  if len(exclusions) > 0:
-    number_of_notes_before_excluding = len(notes)
-    number_of_links_before_excluding = len(links)
-    notes, links = exclude_notes(notes, links, exclusions)
-    print(
-        f'Excluded {number_of_notes_before_excluding - len(notes)} notes ({number_of_links_before_excluding - len(links)} links)')
+  with stats.stage('render'):
+    return render_notes(notes, links, rewrite_as_links, render_frontmatter, graph.aliases)
 
-  render_links_in_content(links.values(), rewrite_as_links)
 
-  if render_index:
-    index_links = create_index_note(notes)
-    render_links_in_content(index_links, rewrite_as_links)
+def run_backlinker(parameters):
+  """
+  Loads, backlinks, renders and writes out the notes as set up by `parameters`.
+  Returns the timings and counters of the run, see `Stats.as_dict`
+  """
+  stats = Stats()
+
+  notes_list = load_notes_from_parameters(parameters, stats)
+
+  if parameters.get('store', None) is not None:
+    # the store module builds on this one
+    from .store import update_store_from_parameters
+
+    # stored before rendering rewrites the content of the notes
+    with stats.stage('store'):
+      update_store_from_parameters(parameters, notes_list)
+
+  rendered_notes = render_backlinked_notes(notes_list, parameters, stats)
+
+  with stats.stage('output'):
+    output_notes(rendered_notes, parameters['output'], parameters.get('jobs', 1), parameters.get('fsync', False),
+                 stats=stats)
 
-  rendered_notes = render_notes(notes, links, rewrite_as_links, render_frontmatter)
+  if parameters.get('stats', False):
+    print(stats.report())
 
-  output_notes(rendered_notes, output_dir)
+  return stats.as_dict()
@@ -0,0 +1,107 @@
+"""
+On-disk cache of parsed notes, so that only the notes which changed since the last run are parsed again
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+# bump whenever the layout of cached records changes, older caches are then ignored
+CACHE_VERSION = 2
+CACHE_DIR = '.backlinker-cache'
+CACHE_FILE = 'notes.json'
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(text):
+  return hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+class ParseCache(object):
+  """
+  Parsed records keyed by note path. An entry is reused when the size and mtime of the file are unchanged, or
+  failing that when the digest of the file content is unchanged
+  """
+
+  def __init__(self, cache_dir):
+    self.cache_dir = cache_dir
+    self.entries = dict()
+    self.seen = set()
+    self.hits = 0
+    self.changed = False
+
+  @classmethod
+  def open(cls, cache_dir):
+    cache = cls(cache_dir)
+    cache.load()
+    return cache
+
+  @property
+  def path(self):
+    return os.path.join(self.cache_dir, CACHE_FILE)
+
+  def load(self):
+    try:
+      with open(self.path, 'r') as f:
+        contents = json.load(f)
+    except (OSError, ValueError):
+      return
+
+    if not isinstance(contents, dict) or contents.get('version') != CACHE_VERSION:
+      logger.warning('Ignoring parse cache with unsupported version: %s', self.path)
+      return
+
+    self.entries = contents['entries']
+
+  def get(self, path, stat, digest=None):
+    entry = self.entries.get(path, None)
+    if entry is None:
+      return None
+
+    if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+      if digest is None or entry['digest'] != digest:
+        return None
+
+      # touched but not changed, remember the new stat so the next lookup is cheap
+      entry['size'] = stat.st_size
+      entry['mtime_ns'] = stat.st_mtime_ns
+      self.changed = True
+
+    self.seen.add(path)
+    self.hits += 1
+    return entry['record']
+
+  def put(self, path, stat, digest, record):
+    self.entries[path] = dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns, digest=digest, record=record)
+    self.seen.add(path)
+    self.changed = True
+
+  def save(self):
+    # entries for notes that no longer exist are dropped
+    entries = {path: entry for path, entry in self.entries.items() if path in self.seen}
+    if not self.changed and len(entries) == len(self.entries):
+      return
+
+    try:
+      self._write(entries)
+    except OSError as e:
+      # the cache only saves time, a run goes on without it where it cannot be written
+      logger.warning('Unable to save parse cache in %s: %s', self.cache_dir, e)
+      return
+
+    self.entries = entries
+    self.changed = False
+
+  def _write(self, entries):
+    os.makedirs(self.cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f'.{CACHE_FILE}.', suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+      os.replace(temp_path, self.path)
+    except BaseException:
+      os.unlink(temp_path)
+      raise
@@ -0,0 +1,151 @@
+"""
+Check mode: validates a vault from the headers and links of its notes, without rendering or writing anything
+"""
+
+import logging
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .backlinker import BACKLINKER_MARKER, Note, discover_notes
+from .progress import Progress
+
+logger = logging.getLogger(__name__)
+
+# the body after the header is read in chunks of about this many characters
+CHUNK_SIZE = 64 * 1024
+
+# the title of a `[[Title|Alias]]` wikilink, as `WIKILINK_PATTERN` matches it
+WIKILINK_TITLE_PATTERN = re.compile(r'\[\[(.*?)(?:\|.*?)?\]\]')
+
+# the titles of a note and the titles it links to, all that checking a vault needs
+NoteHeader = namedtuple('NoteHeader', ['path', 'title', 'other_titles', 'links'])
+
+
+def _read_header(f):
+  """
+  Reads lines from `f` up to the `# Title` line and the three lines after it, which may hold the `aka` line.
+  Returns the lines read, and whether the rendered backlinks were reached
+  """
+  lines = []
+  separators = 0
+  content_lines = 0
+  for line in f:
+    lines.append(line)
+    if BACKLINKER_MARKER in line:
+      return lines, True
+
+    if separators < 2:
+      separators += line.count('---')
+      continue
+
+    if content_lines > 0 or line.strip() != "":
+      content_lines += 1
+      if content_lines == 4:
+        break
+
+  return lines, False
+
+
+def scan_note(input_dir, path):
+  """
+  Reads the titles of the note at `path` from its header, then streams the rest of the body line by line for links
+  """
+  with open(os.path.join(input_dir, path), 'r') as f:
+    lines, reached_marker = _read_header(f)
+
+    note = Note(path)
+    note.parse("".join(lines))
+    links = set(WIKILINK_TITLE_PATTERN.findall(note.content))
+
+    if not reached_marker:
+      for chunk in iter(lambda: f.read(CHUNK_SIZE), ""):
+        # wikilinks never span lines, so a chunk is only scanned up to its last complete line
+        if not chunk.endswith('\n'):
+          chunk += f.readline()
+
+        end = chunk.find(BACKLINKER_MARKER)
+        if end != -1:
+          chunk = chunk[:end]
+
+        links.update(WIKILINK_TITLE_PATTERN.findall(chunk))
+        if end != -1:
+          break
+
+  return NoteHeader(path, note.title, note.other_titles, links)
+
+
+def find_problems(headers, allowed_dangling=()):
+  """
+  Returns a description of every duplicate title, duplicate other title and link to a title without a note in
+  `headers`, other than links to `allowed_dangling` titles
+  """
+  paths_by_title = dict()
+  paths_by_other_title = dict()
+  sources_by_link = dict()
+  for header in headers:
+    paths_by_title.setdefault(header.title, []).append(header.path)
+    for other_title in header.other_titles:
+      paths_by_other_title.setdefault(other_title, []).append(header.path)
+    for link in header.links:
+      sources_by_link.setdefault(link, []).append(header.path)
+
+  problems = []
+  for title, paths in sorted(paths_by_title.items()):
+    if len(paths) > 1:
+      problems.append(f"note title '{title}' occurs more than once: {', '.join(sorted(paths))}")
+
+  for other_title, paths in sorted(paths_by_other_title.items()):
+    if len(paths) > 1:
+      problems.append(f"note other title '{other_title}' occurs more than once: {', '.join(sorted(paths))}")
+
+  allowed_dangling = set(allowed_dangling)
+  for link, paths in sorted(sources_by_link.items()):
+    if link not in paths_by_title and link not in paths_by_other_title and link not in allowed_dangling:
+      problems.append(f"link to '{link}' has no note: {', '.join(sorted(paths))}")
+
+  return problems
+
+
+def check_vault(input_dir, jobs=1, allowed_dangling=()):
+  """
+  Scans every `*.md` note in `input_dir` and its folders, on `jobs` threads, and returns the problems found in the vault
+  """
+  input_paths = [path for path, _ in discover_notes(input_dir, jobs)]
+
+  problems = []
+  with Progress('Checking', len(input_paths)) as progress:
+
+    def scan(path):
+      logger.debug('Checking %s', path)
+      try:
+        return scan_note(input_dir, path)
+      except (OSError, IndexError, UnicodeDecodeError) as e:
+        problems.append(f"unable to read note: {path}: {e}")
+        return None
+      finally:
+        progress.update()
+
+    if jobs > 1:
+      with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='backlinker-check') as executor:
+        headers = list(executor.map(scan, input_paths))
+    else:
+      headers = [scan(path) for path in input_paths]
+
+  problems.sort()
+  problems.extend(find_problems([header for header in headers if header is not None], allowed_dangling))
+
+  logger.info('Checked %d notes: %d problems', len(input_paths), len(problems))
+  return problems
+
+
+def run_check(parameters):
+  """
+  Checks the vault as set up by `parameters`, printing every problem found. Returns whether the vault is consistent
+  """
+  problems = check_vault(parameters['input'], parameters.get('jobs', 1), parameters.get('allow_dangling', []))
+  for problem in problems:
+    print(problem)
+
+  return len(problems) == 0
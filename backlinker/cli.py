@@ -3,9 +3,17 @@ Backlinker
 """
 
 import argparse
+import logging
 import os
 import sys
 from .backlinker import run_backlinker
+from .cache import CACHE_DIR
+from .check import run_check
+from .progress import Progress, ProgressAwareHandler
+from .serve import serve
+from .store import run_query
+from .stream import run_streaming
+from .watch import watch
 
 
 def dir_path_arg_type(path):
@@ -15,14 +23,42 @@ def dir_path_arg_type(path):
     raise argparse.ArgumentTypeError(f"readable_dir: {path} is not a valid path")
 
 
+def positive_int_arg_type(value):
+  try:
+    number = int(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"positive_int: {value} is not an integer")
+
+  if number < 1:
+    raise argparse.ArgumentTypeError(f"positive_int: {value} must be at least 1")
+
+  return number
+
+
+def positive_float_arg_type(value):
+  try:
+    number = float(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"positive_float: {value} is not a number")
+
+  if number <= 0:
+    raise argparse.ArgumentTypeError(f"positive_float: {value} must be greater than 0")
+
+  return number
+
+
 def argument_parser():
-  parser = argparse.ArgumentParser(description=__doc__)
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   epilog='run "backlinker serve --help" for answering link queries from a resident process, '
+                                   'or "backlinker query --help" for querying a --store database')
   parser.add_argument('--input', type=dir_path_arg_type, required=True, help='input directory for .md notes to backlink')
 
   output_group = parser.add_mutually_exclusive_group(required=True)
   output_group.add_argument('--output', type=dir_path_arg_type, help='output directory for backlinked .md notes')
   output_group.add_argument('--in-place', action='store_true',
                             help='render backlinked .md notes into the input directory -- limits other options to avoid destructive changes to existing notes')
+  output_group.add_argument('--check', action='store_true',
+                            help='only check the notes for duplicate titles and links to titles without a note, writing nothing and exiting non-zero on any problem')
 
   rewrite_group = parser.add_mutually_exclusive_group()
   rewrite_group.add_argument('--rewrite-as-links', dest='rewrite_as_links', action='store_true',
@@ -32,6 +68,12 @@ def argument_parser():
   parser.add_argument('--exclude', type=str, nargs='+',
                       help='the list of note tags or titles to exclude from the render')
 
+  exclude_depth_group = parser.add_mutually_exclusive_group()
+  exclude_depth_group.add_argument('--exclude-depth', type=positive_int_arg_type,
+                                   help='also exclude notes linking to an excluded note, up to this many links away from an --exclude title (default 1)')
+  exclude_depth_group.add_argument('--exclude-transitive', action='store_true',
+                                   help='exclude every note linking to an excluded note, however many links away')
+
   frontmatter_group = parser.add_mutually_exclusive_group()
   frontmatter_group.add_argument('--render-frontmatter', dest='render_frontmatter', action='store_true',
                                  help='render YAML frontmatter in backlinked notes (default)')
@@ -41,13 +83,154 @@ def argument_parser():
   index_group = parser.add_mutually_exclusive_group()
   index_group.add_argument('--render-index', dest='render_index', action='store_true', help='generate an Index.md note')
   index_group.add_argument('--no-render-index', dest='render_index', action='store_false', help='do not generate an Index.md note (default)')
+  parser.add_argument('--shard-index', action='store_true',
+                      help='with --render-index, list the titles of each letter in its own "Index - A.md" note linked from Index.md')
+
+  parser.add_argument('--allow-dangling', type=str, nargs='+',
+                      help='with --check, titles such as tags that are expected to be linked to without having a note')
+
+  parser.add_argument('--jobs', type=positive_int_arg_type,
+                      help='number of worker threads used to load, parse and write notes (default 1)')
+  parser.add_argument('--processes', action='store_true',
+                      help='use --jobs worker processes instead of threads to load notes, exclude sections and extract links')
+
+  parser.add_argument('--fsync', action='store_true',
+                      help='flush written notes to disk before finishing, for crash safety of --in-place runs')
+
+  cache_group = parser.add_mutually_exclusive_group()
+  cache_group.add_argument('--cache', dest='cache', action='store_true',
+                           help='reuse parsed notes that are unchanged since the last run (default)')
+  cache_group.add_argument('--no-cache', dest='cache', action='store_false', help='parse every note, ignoring and not updating the parse cache')
+  parser.add_argument('--cache-dir', type=str,
+                      help=f'directory for the parse cache (default {CACHE_DIR} inside the input directory)')
+
+  parser.add_argument('--stats', action='store_true', help='report the time taken by each stage and counts of the work done')
+
+  parser.add_argument('--stream', action='store_true',
+                      help='render in two passes, first reading only the titles and links of each note and then reading, '
+                      'rendering and writing one note at a time, so memory grows with the links rather than the notes '
+                      '(does not use the parse cache)')
+
+  parser.add_argument('--store', type=str,
+                      help='also keep the notes, other titles and links in this SQLite database for "backlinker query", '
+                      'updating only the notes that changed')
+
+  verbosity_group = parser.add_mutually_exclusive_group()
+  verbosity_group.add_argument('-q', '--quiet', action='store_true', help='only report warnings and errors')
+  verbosity_group.add_argument('-v', '--verbose', action='store_true', help='report every note and link as it is processed')
+
+  parser.add_argument('--watch', action='store_true',
+                      help='keep running, re-rendering the notes affected by each change to the input directory')
+  parser.add_argument('--watch-interval', type=positive_float_arg_type,
+                      help='seconds between checks for changes when watching (default 0.5)')
+
+  parser.set_defaults(in_place=False, check=False, allow_dangling=[], rewrite_as_links=False, render_frontmatter=True,
+                      exclude=[], exclude_depth=1, exclude_transitive=False, render_index=False, shard_index=False,
+                      jobs=1, processes=False, fsync=False, cache=True, cache_dir=None, stats=False, store=None,
+                      stream=False, watch=False, watch_interval=0.5)
+
+  return parser
+
+
+def serve_argument_parser():
+  parser = argparse.ArgumentParser(prog='backlinker serve',
+                                   description='Answer JSON requests for backlinks, outgoing links, other titles and '
+                                   'rendered notes over a Unix domain socket, keeping the notes up to date with changes')
+  parser.add_argument('--input', type=dir_path_arg_type, required=True, help='input directory for .md notes to serve')
+  parser.add_argument('--socket', type=str, required=True, help='path of the Unix domain socket to listen on')
+
+  parser.add_argument('--exclude', type=str, nargs='+', help='the list of section labels to exclude from the notes')
+
+  rewrite_group = parser.add_mutually_exclusive_group()
+  rewrite_group.add_argument('--rewrite-as-links', dest='rewrite_as_links', action='store_true',
+                             help='render notes with [[Link]] backlinker syntax rewritten as [Link](Link.md) link syntax')
+  rewrite_group.add_argument('--no-rewrite-as-links', dest='rewrite_as_links', action='store_false',
+                             help='do not rewrite [[Link]] backlinker syntax in rendered notes (default)')
+
+  frontmatter_group = parser.add_mutually_exclusive_group()
+  frontmatter_group.add_argument('--render-frontmatter', dest='render_frontmatter', action='store_true',
+                                 help='render YAML frontmatter in rendered notes (default)')
+  frontmatter_group.add_argument('--no-render-frontmatter', dest='render_frontmatter', action='store_false',
+                                 help='omit any existing YAML frontmatter from rendered notes')
+
+  parser.add_argument('--jobs', type=positive_int_arg_type, help='number of worker threads used to load notes (default 1)')
+
+  cache_group = parser.add_mutually_exclusive_group()
+  cache_group.add_argument('--cache', dest='cache', action='store_true',
+                           help='reuse parsed notes that are unchanged since the last run (default)')
+  cache_group.add_argument('--no-cache', dest='cache', action='store_false', help='parse every note, ignoring and not updating the parse cache')
+  parser.add_argument('--cache-dir', type=str,
+                      help=f'directory for the parse cache (default {CACHE_DIR} inside the input directory)')
 
-  parser.set_defaults(in_place=False, rewrite_as_links=False, render_frontmatter=True,
-                      exclude=[], render_index=False)
+  parser.add_argument('--watch-interval', type=positive_float_arg_type,
+                      help='seconds between checks for changes (default 0.5)')
+
+  verbosity_group = parser.add_mutually_exclusive_group()
+  verbosity_group.add_argument('-q', '--quiet', action='store_true', help='only report warnings and errors')
+  verbosity_group.add_argument('-v', '--verbose', action='store_true', help='report every note as it is loaded')
+
+  parser.set_defaults(exclude=[], rewrite_as_links=False, render_frontmatter=True, jobs=1, cache=True, cache_dir=None,
+                      watch_interval=0.5)
 
   return parser
 
 
+def validate_serve_arguments(args):
+  return {
+      'cache': args.cache,
+      'cache_dir': args.cache_dir,
+      'exclude': args.exclude,
+      'input': args.input,
+      'jobs': args.jobs,
+      'render_frontmatter': args.render_frontmatter,
+      'rewrite_as_links': args.rewrite_as_links,
+      'socket': args.socket,
+      'watch_interval': args.watch_interval
+  }
+
+
+def query_argument_parser():
+  parser = argparse.ArgumentParser(prog='backlinker query',
+                                   description='Answer questions about the links between notes from a graph store '
+                                   'written by --store, without reading the notes')
+  parser.add_argument('--store', type=str, required=True, help='path of the SQLite graph store to query')
+  parser.add_argument('--input', type=dir_path_arg_type,
+                      help='first bring the store up to date with the .md notes in this directory')
+  parser.add_argument('--exclude', type=str, nargs='+', help='with --input, the list of section labels to exclude from the notes '
+                      '(default the sections the store was last updated without)')
+  parser.add_argument('--jobs', type=positive_int_arg_type,
+                      help='with --input, number of worker threads used to read changed notes (default 1)')
+  parser.add_argument('--json', action='store_true', help='print the answer as JSON')
+
+  queries = parser.add_subparsers(dest='query', metavar='QUERY', required=True)
+  backlinks_parser = queries.add_parser('backlinks', help='notes linking to a note, by its title or other titles')
+  backlinks_parser.add_argument('title')
+  queries.add_parser('dangling', help='titles linked to without a note, and the notes linking to them')
+  queries.add_parser('orphans', help='notes that no note links to')
+  alias_parser = queries.add_parser('alias', help='the note a title or other title leads to, and its other titles')
+  alias_parser.add_argument('title')
+
+  verbosity_group = parser.add_mutually_exclusive_group()
+  verbosity_group.add_argument('-q', '--quiet', action='store_true', help='only report warnings and errors')
+  verbosity_group.add_argument('-v', '--verbose', action='store_true', help='report every note as it is stored')
+
+  parser.set_defaults(exclude=None, jobs=1, title=None)
+
+  return parser
+
+
+def validate_query_arguments(args):
+  return {
+      'exclude': args.exclude,
+      'input': args.input,
+      'jobs': args.jobs,
+      'json': args.json,
+      'query': args.query,
+      'store': args.store,
+      'title': args.title
+  }
+
+
 def validate_arguments(args):
   if args.in_place and args.output:
     raise ValueError('Cannot specify both --in-place and --output')
@@ -61,20 +244,78 @@ def validate_arguments(args):
   if args.in_place and (not args.render_frontmatter or args.rewrite_as_links):
     raise ValueError('Cannot specify --no-render-frontmatter or --rewrite-as-links when --in-place set (too destructive)')
 
+  if args.stream and (args.watch or args.processes or args.store):
+    raise ValueError('Cannot specify --watch, --processes or --store when --stream set')
+
+  if args.watch and (args.store or args.stats):
+    raise ValueError('Cannot specify --store or --stats when --watch set')
+
   return {
+      'allow_dangling': args.allow_dangling,
+      'cache': args.cache,
+      'check': args.check,
+      'cache_dir': args.cache_dir,
       'exclude': args.exclude,
+      'exclude_depth': None if args.exclude_transitive else args.exclude_depth,
+      'fsync': args.fsync,
       'input': args.input,
+      'jobs': args.jobs,
       'output': args.output if not args.in_place else args.input,
+      'processes': args.processes,
       'render_index': args.render_index,
       'render_frontmatter': args.render_frontmatter,
-      'rewrite_as_links': args.rewrite_as_links
+      'rewrite_as_links': args.rewrite_as_links,
+      'shard_index': args.shard_index,
+      'stats': args.stats,
+      'store': args.store,
+      'stream': args.stream,
+      'watch': args.watch,
+      'watch_interval': args.watch_interval
   }
 
 
+def configure_logging(quiet, verbose):
+  level = logging.WARNING if quiet else logging.DEBUG if verbose else logging.INFO
+
+  handler = ProgressAwareHandler(sys.stderr)
+  handler.setFormatter(logging.Formatter('%(message)s'))
+
+  logger = logging.getLogger('backlinker')
+  logger.addHandler(handler)
+  logger.setLevel(level)
+
+  # a progress line is only useful on a terminal, and verbose output would keep erasing it
+  Progress.stream = sys.stderr
+  Progress.enabled = level == logging.INFO and sys.stderr.isatty()
+
+
 def cli():
+  if sys.argv[1:2] == ['serve']:
+    args = serve_argument_parser().parse_args(sys.argv[2:])
+    configure_logging(args.quiet, args.verbose)
+    serve(validate_serve_arguments(args))
+    return
+
+  if sys.argv[1:2] == ['query']:
+    args = query_argument_parser().parse_args(sys.argv[2:])
+    configure_logging(args.quiet, args.verbose)
+    if not run_query(validate_query_arguments(args)):
+      sys.exit(1)
+    return
+
   parser = argument_parser()
 
   args = parser.parse_args()
   parameters = validate_arguments(args)
 
-  run_backlinker(parameters)
+  configure_logging(args.quiet, args.verbose)
+
+  if parameters['check']:
+    if not run_check(parameters):
+      sys.exit(1)
+  elif parameters['watch']:
+    watch(parameters)
+  elif parameters['stream']:
+    run_streaming(parameters)
+  else:
+    run_backlinker(parameters)
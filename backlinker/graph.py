@@ -0,0 +1,128 @@
+"""
+Integer-ID core of the link graph: every title in a vault gets a dense ID and links are held as compressed sparse row
+arrays in both directions
+"""
+
+from array import array
+
+
+def _offsets(counts):
+  offsets = array('l', [0]) * (len(counts) + 1)
+  for i, count in enumerate(counts):
+    offsets[i + 1] = offsets[i] + count
+
+  return offsets
+
+
+class LinkIndex(object):
+  """
+  Titles are numbered in sorted order, so sorting IDs sorts by title. `notes[id]` is the note with that title or None,
+  and `destinations[id]` is the ID of the note a link to that title leads to, or -1 when no note has that title.
+  `targets(id)` are the titles linked from a note and `sources(id)` the notes linking to a title, both sorted arrays
+  of IDs
+  """
+
+  __slots__ = ('titles', 'ids', 'notes', 'destinations', 'outgoing_offsets', 'outgoing', 'incoming_offsets',
+               'incoming')
+
+  def __init__(self, notes_list):
+    titles = set()
+    for note in notes_list:
+      titles.add(note.title)
+      titles.update(note.other_titles)
+      titles.update(note.find_links())
+
+    self.titles = sorted(titles)
+    self.ids = {title: title_id for title_id, title in enumerate(self.titles)}
+
+    self.notes = [None] * len(self.titles)
+    self.destinations = array('l', [-1]) * len(self.titles)
+    for note in notes_list:
+      note_id = self.ids[note.title]
+      self.notes[note_id] = note
+      self.destinations[note_id] = note_id
+      for other_title in note.other_titles:
+        self.destinations[self.ids[other_title]] = note_id
+
+    self._index_outgoing()
+    self._index_incoming()
+
+  def _index_outgoing(self):
+    counts = array('l', [0]) * len(self.titles)
+    self.outgoing = array('l')
+    for note_id, note in enumerate(self.notes):
+      if note is not None:
+        row = sorted(map(self.ids.__getitem__, note.find_links()))
+        counts[note_id] = len(row)
+        self.outgoing.extend(row)
+
+    self.outgoing_offsets = _offsets(counts)
+
+  def _index_incoming(self):
+    counts = array('l', [0]) * len(self.titles)
+    for target_id in self.outgoing:
+      counts[target_id] += 1
+
+    self.incoming_offsets = _offsets(counts)
+    incoming = array('l', [0]) * len(self.outgoing)
+
+    # sources are visited in ID order, so every row of incoming comes out sorted
+    fill = self.incoming_offsets[:-1]
+    outgoing = self.outgoing
+    offsets = self.outgoing_offsets
+    for source_id in range(len(self.titles)):
+      for i in range(offsets[source_id], offsets[source_id + 1]):
+        target_id = outgoing[i]
+        incoming[fill[target_id]] = source_id
+        fill[target_id] += 1
+
+    self.incoming = incoming
+
+  def __len__(self):
+    return len(self.titles)
+
+  def id_of(self, title):
+    return self.ids.get(title, -1)
+
+  def targets(self, title_id):
+    return self.outgoing[self.outgoing_offsets[title_id]:self.outgoing_offsets[title_id + 1]]
+
+  def sources(self, title_id):
+    return self.incoming[self.incoming_offsets[title_id]:self.incoming_offsets[title_id + 1]]
+
+  def backlinked_within(self, titles, hops=None):
+    """
+    Returns the IDs of the notes within `hops` links of any of `titles`, found breadth first by following links
+    backwards from a title to the notes linking to it. Notes reached are followed through their title and their other
+    titles. Every link is followed when `hops` is None
+    """
+    visited = bytearray(len(self.titles))
+    frontier = []
+    for title in titles:
+      title_id = self.id_of(title)
+      if title_id != -1 and not visited[title_id]:
+        visited[title_id] = 1
+        frontier.append(title_id)
+
+    reached = []
+    hop = 0
+    while len(frontier) > 0 and (hops is None or hop < hops):
+      hop += 1
+      next_frontier = []
+      for title_id in frontier:
+        for source_id in self.sources(title_id):
+          if visited[source_id]:
+            continue
+
+          visited[source_id] = 1
+          reached.append(source_id)
+          next_frontier.append(source_id)
+          for other_title in self.notes[source_id].other_titles:
+            other_id = self.ids[other_title]
+            if not visited[other_id]:
+              visited[other_id] = 1
+              next_frontier.append(other_id)
+
+      frontier = next_frontier
+
+    return reached
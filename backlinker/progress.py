@@ -0,0 +1,90 @@
+"""
+A single, rate-limited progress line for long running stages, and a logging handler that keeps out of its way
+"""
+
+import logging
+import sys
+import threading
+import time
+
+
+class Progress(object):
+  """
+  Shows `done/total` notes with a rate and ETA for a stage, redrawn on one line at most every `interval` seconds.
+  Disabled unless turned on by the command line, so library callers never see progress output
+  """
+
+  enabled = False
+  stream = sys.stderr
+  interval = 0.1
+
+  # the progress currently drawn, which log output must clear first
+  _drawn = None
+  _draw_lock = threading.Lock()
+
+  def __init__(self, stage, total):
+    self.stage = stage
+    self.total = total
+    self.done = 0
+    self.started = time.monotonic()
+    self.last_drawn = float('-inf')
+    self.width = 0
+    self._lock = threading.Lock()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def update(self, amount=1):
+    if not Progress.enabled:
+      return
+
+    with self._lock:
+      self.done += amount
+      now = time.monotonic()
+      if now - self.last_drawn >= Progress.interval or self.done == self.total:
+        self.last_drawn = now
+        self._draw(now)
+
+  def _draw(self, now):
+    elapsed = now - self.started
+    rate = self.done / elapsed if elapsed > 0 else 0.0
+    eta = (self.total - self.done) / rate if rate > 0 else 0.0
+    line = f"{self.stage}: {self.done}/{self.total} notes ({rate:.0f} notes/s, ETA {eta:.1f}s)"
+
+    with Progress._draw_lock:
+      Progress.stream.write('\r' + line.ljust(self.width))
+      Progress.stream.flush()
+      self.width = len(line)
+      Progress._drawn = self
+
+  def _erase(self):
+    Progress.stream.write('\r' + ' ' * self.width + '\r')
+    Progress.stream.flush()
+    self.width = 0
+
+  def close(self):
+    with Progress._draw_lock:
+      if Progress._drawn is self:
+        self._erase()
+        Progress._drawn = None
+
+  @classmethod
+  def clear_line(cls):
+    with cls._draw_lock:
+      if cls._drawn is not None:
+        cls._drawn._erase()
+        cls._drawn = None
+
+
+class ProgressAwareHandler(logging.StreamHandler):
+  """
+  Erases any progress line before writing a log record, the progress is redrawn on its next update
+  """
+
+  def emit(self, record):
+    if self.stream is Progress.stream:
+      Progress.clear_line()
+    super().emit(record)
@@ -0,0 +1,321 @@
+"""
+Serve mode: keeps the notes and their link graph in memory, up to date with changes to the input directory, and
+answers JSON requests about them over a Unix domain socket.
+
+Each request is a JSON object on a line of its own, such as `{"op": "backlinks", "title": "Cats"}`, answered by a
+line `{"ok": true, "result": ...}` or `{"ok": false, "error": "..."}`. A connection may send any number of requests
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import deque
+
+from .backlinker import load_notes_from_parameters
+from .watch import LiveGraph, apply_changes, start_watcher
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyMetrics(object):
+  """
+  Counts and latencies of the requests of each operation. Percentiles are taken over the latest `window` requests of
+  an operation
+  """
+
+  def __init__(self, window=1000):
+    self.window = window
+    self.operations = dict()
+    self._lock = threading.Lock()
+
+  def record(self, op, seconds, ok):
+    with self._lock:
+      entry = self.operations.get(op, None)
+      if entry is None:
+        entry = dict(count=0, errors=0, total=0.0, max=0.0, recent=deque(maxlen=self.window))
+        self.operations[op] = entry
+
+      entry['count'] += 1
+      entry['errors'] += 0 if ok else 1
+      entry['total'] += seconds
+      entry['max'] = max(entry['max'], seconds)
+      entry['recent'].append(seconds)
+
+  def as_dict(self):
+    """
+    Returns the counts and latencies, in microseconds, of each operation
+    """
+    with self._lock:
+      return {op: _summarise_latencies(entry) for op, entry in sorted(self.operations.items())}
+
+
+def _summarise_latencies(entry):
+  recent = sorted(entry['recent'])
+
+  def percentile(fraction):
+    return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1e6
+
+  return {
+      'count': entry['count'],
+      'errors': entry['errors'],
+      'mean_us': entry['total'] / entry['count'] * 1e6,
+      'p50_us': percentile(0.5),
+      'p99_us': percentile(0.99),
+      'max_us': entry['max'] * 1e6
+  }
+
+
+class RequestError(Exception):
+  pass
+
+
+class BacklinkService(object):
+  """
+  Answers requests about the notes held in `graph`, a LiveGraph, which `refresh` keeps up to date with changes to
+  the input directory. Requests and refreshes may come from different threads, and are answered one at a time
+  """
+
+  def __init__(self, graph, parameters):
+    self.graph = graph
+    self.parameters = parameters
+    self.input_dir = parameters['input']
+    self.exclusions = parameters['exclude']
+    self.rewrite_as_links = parameters.get('rewrite_as_links', False)
+    self.render_frontmatter = parameters.get('render_frontmatter', True)
+    self.metrics = LatencyMetrics()
+    self.operations = {
+        'backlinks': self.backlinks,
+        'outgoing': self.outgoing,
+        'resolve': self.resolve,
+        'render': self.render,
+        'metrics': self.report_metrics
+    }
+    self._lock = threading.Lock()
+
+  def refresh(self, names):
+    """
+    Reloads the notes `names` from the input directory, returning the notes whose rendering may have changed.
+    When that fails the graph may be left half updated, so the whole vault is loaded again before raising
+    """
+    with self._lock:
+      try:
+        return apply_changes(self.graph, self.input_dir, names, self.exclusions)
+      except Exception:
+        self.graph = LiveGraph(load_notes_from_parameters(self.parameters))
+        raise
+
+  def _lookup(self, request, with_file=False):
+    title = request.get('title', None)
+    if not isinstance(title, str):
+      raise RequestError("request has no title")
+
+    # other titles lead to the note that has them
+    note = self.graph.notes.get(self.graph.owners.get(title, title), None)
+    if note is None or (with_file and self.graph.is_placeholder(note)):
+      raise RequestError(f"no note titled '{title}'")
+
+    return note
+
+  def _path(self, note):
+    # placeholders for titles without a note have no file
+    return None if self.graph.is_placeholder(note) else note.path
+
+  def backlinks(self, request):
+    """
+    The notes linking to a note, by its title or any of its other titles, or to a title without a note
+    """
+    note = self._lookup(request)
+
+    backlinks = []
+    for title in [note.title, *sorted(note.other_titles)]:
+      link = self.graph.links.get(title, None)
+      if link is not None:
+        for source in sorted(link.sources, key=lambda source: source.title):
+          backlinks.append(dict(title=source.title, path=source.path, via=title))
+
+    return dict(title=note.title, path=self._path(note), backlinks=backlinks)
+
+  def outgoing(self, request):
+    """
+    The titles a note links to, and the note each leads to
+    """
+    note = self._lookup(request, with_file=True)
+
+    outgoing = []
+    for title in sorted(note.find_links()):
+      destination = self.graph.links[title].destination
+      outgoing.append(dict(title=title, destination=destination.title, path=self._path(destination)))
+
+    return dict(title=note.title, path=note.path, outgoing=outgoing)
+
+  def resolve(self, request):
+    """
+    The note a title or other title leads to
+    """
+    note = self._lookup(request, with_file=True)
+
+    return dict(title=request['title'], note=note.title, path=note.path)
+
+  def render(self, request):
+    """
+    A note as a run would render it
+    """
+    note = self._lookup(request, with_file=True)
+
+    rendered = self.graph.render(note, self.rewrite_as_links, self.render_frontmatter)
+    return dict(title=note.title, path=note.path, rendered=rendered)
+
+  def report_metrics(self, request):
+    return dict(notes=len(self.graph.by_path), requests=self.metrics.as_dict())
+
+  def handle(self, request):
+    """
+    Answers a decoded request, recording how long it took
+    """
+    started = time.perf_counter()
+
+    requested = request.get('op', None) if isinstance(request, dict) else None
+    # an op may decode to any JSON value, including unhashable ones
+    op = requested if isinstance(requested, str) and requested in self.operations else 'invalid'
+    if op == 'invalid':
+      response = dict(ok=False, error=f"unknown op: {requested}")
+    else:
+      try:
+        with self._lock:
+          response = dict(ok=True, result=self.operations[op](request))
+      except RequestError as e:
+        response = dict(ok=False, error=str(e))
+      except Exception as e:
+        # a failed request must still be answered, and must not end the connection
+        logger.exception('Failed to answer %s request', op)
+        response = dict(ok=False, error=f"internal error: {e}")
+
+    self.metrics.record(op, time.perf_counter() - started, response['ok'])
+    return response
+
+  def handle_line(self, line):
+    """
+    Answers a request line, returning the response line
+    """
+    try:
+      request = json.loads(line)
+    except ValueError as e:
+      self.metrics.record('invalid', 0.0, False)
+      response = dict(ok=False, error=f"invalid request: {e}")
+    else:
+      response = self.handle(request)
+
+    return json.dumps(response).encode('utf-8') + b"\n"
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+  def handle(self):
+    for line in self.rfile:
+      if line.strip():
+        self.wfile.write(self.server.service.handle_line(line))
+        self.wfile.flush()
+
+
+class BacklinkServer(socketserver.ThreadingUnixStreamServer):
+  """
+  Serves the requests of each connection to `socket_path` on a thread of its own
+  """
+
+  daemon_threads = True
+
+  def __init__(self, socket_path, service):
+    self.service = service
+    # notes are private to the user serving them, so the socket is created without access for anyone else
+    umask = os.umask(0o177)
+    try:
+      super().__init__(socket_path, _RequestHandler)
+    finally:
+      os.umask(umask)
+
+
+def _remove_stale_socket(socket_path):
+  try:
+    mode = os.stat(socket_path).st_mode
+  except FileNotFoundError:
+    return
+
+  if not stat.S_ISSOCK(mode):
+    raise ValueError(f"{socket_path} exists and is not a socket")
+
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+    try:
+      probe.connect(socket_path)
+    except ConnectionRefusedError:
+      # left behind by a server that did not shut down cleanly
+      os.unlink(socket_path)
+      return
+
+  raise ValueError(f"another server is listening on {socket_path}")
+
+
+def _refresh_until_stopped(service, watcher, stopped):
+  while not stopped.is_set():
+    names = watcher.wait()
+    if len(names) == 0:
+      continue
+
+    started = time.perf_counter()
+    try:
+      affected = service.refresh(names)
+    except Exception:
+      # the vault has been loaded again, so the graph is up to date with the input directory
+      logger.exception('Failed to refresh %d notes, reloaded %d notes', len(names), len(service.graph.by_path))
+      continue
+
+    logger.info('Refreshed %d notes (%d affected) in %.0fms', len(names), len(affected),
+                (time.perf_counter() - started) * 1000)
+
+
+def _interrupt(signum, frame):
+  raise KeyboardInterrupt()
+
+
+def serve(parameters):
+  """
+  Loads the vault, then answers requests on the `socket` path until interrupted, refreshing the notes on each
+  change to the input directory
+  """
+  input_dir = parameters['input']
+  socket_path = parameters['socket']
+
+  # fail before loading the vault when another server has the socket
+  _remove_stale_socket(socket_path)
+
+  service = BacklinkService(LiveGraph(load_notes_from_parameters(parameters)), parameters)
+  server = BacklinkServer(socket_path, service)
+
+  watcher = start_watcher(input_dir, parameters.get('watch_interval', 0.5))
+  stopped = threading.Event()
+  refresher = threading.Thread(target=_refresh_until_stopped, args=(service, watcher, stopped),
+                               name='backlinker-refresh', daemon=True)
+  refresher.start()
+
+  # a service manager stops the server with SIGTERM, which should clean up as Ctrl-C does
+  signal.signal(signal.SIGTERM, _interrupt)
+
+  logger.info('Serving %d notes from %s on %s (%s)', len(service.graph.by_path), input_dir, socket_path,
+              watcher.name)
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    stopped.set()
+    server.server_close()
+    os.unlink(socket_path)
+
+  for op, metrics in service.metrics.as_dict().items():
+    logger.info('%s: %d requests, %d errors, p50 %.0fus, p99 %.0fus', op, metrics['count'], metrics['errors'],
+                metrics['p50_us'], metrics['p99_us'])
@@ -0,0 +1,75 @@
+"""
+Timings and counters collected over a backlinker run
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Stats(object):
+  """
+  Wall and CPU time per stage, in the order the stages first ran, and named counters.
+  CPU time is that of the calling process, so work done in worker processes is not included
+  """
+
+  def __init__(self):
+    self.stages = dict()
+    self.counters = dict()
+    self._lock = threading.Lock()
+
+  @contextmanager
+  def stage(self, name):
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+      yield
+    finally:
+      wall, cpu = self.stages.get(name, (0.0, 0.0))
+      self.stages[name] = (wall + time.perf_counter() - wall_started, cpu + time.process_time() - cpu_started)
+
+  def count(self, name, amount=1):
+    # counted from loader and writer threads
+    with self._lock:
+      self.counters[name] = self.counters.get(name, 0) + amount
+
+  def set(self, name, value):
+    with self._lock:
+      self.counters[name] = value
+
+  def as_dict(self):
+    return {
+        'stages': {name: dict(wall=wall, cpu=cpu) for name, (wall, cpu) in self.stages.items()},
+        'counters': dict(self.counters)
+    }
+
+  def report(self):
+    lines = [f"{'stage':<20}{'wall (s)':>10}{'cpu (s)':>10}"]
+    for name, (wall, cpu) in self.stages.items():
+      lines.append(f"{name:<20}{wall:>10.3f}{cpu:>10.3f}")
+
+    total_wall = sum(wall for wall, _ in self.stages.values())
+    total_cpu = sum(cpu for _, cpu in self.stages.values())
+    lines.append(f"{'total':<20}{total_wall:>10.3f}{total_cpu:>10.3f}")
+
+    lines.append("")
+    for name, value in self.counters.items():
+      lines.append(f"{name:<20}{value:>10}")
+
+    return "\n".join(lines)
+
+
+class NullStats(Stats):
+  """
+  Stands in when the caller does not want stats, so stages need not check
+  """
+
+  @contextmanager
+  def stage(self, name):
+    yield
+
+  def count(self, name, amount=1):
+    pass
+
+  def set(self, name, value):
+    pass
@@ -0,0 +1,285 @@
+"""
+Graph store: the notes, other titles and links of a vault kept in a SQLite database, updated from the notes that
+changed since the last update, and queried without loading the vault
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .backlinker import Note, discover_notes, exclude_sections_from_notes
+
+logger = logging.getLogger(__name__)
+
+# bump whenever the schema changes, older stores are then rebuilt
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notes (
+  id INTEGER PRIMARY KEY,
+  path TEXT NOT NULL UNIQUE,
+  title TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_by_title ON notes (title);
+CREATE TABLE IF NOT EXISTS aliases (
+  title TEXT NOT NULL,
+  note_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+  PRIMARY KEY (title, note_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS aliases_by_note ON aliases (note_id);
+CREATE TABLE IF NOT EXISTS links (
+  source_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+  title TEXT NOT NULL,
+  PRIMARY KEY (source_id, title)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_by_title ON links (title, source_id);
+"""
+
+# changed notes are read from disk and stored this many at a time
+BATCH_SIZE = 256
+
+StoredNote = namedtuple('StoredNote', ['title', 'path'])
+Backlink = namedtuple('Backlink', ['title', 'path', 'via'])
+
+
+class GraphStore(object):
+  """
+  A SQLite database at `path` holding a row per note with the size and mtime its file had when stored, and the other
+  titles and outgoing link titles of each note. Links are stored by title, so they are resolved when queried
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self.connection = sqlite3.connect(path)
+    self.connection.execute('PRAGMA foreign_keys = ON')
+    self.connection.execute('PRAGMA journal_mode = WAL')
+    self.connection.execute('PRAGMA synchronous = NORMAL')
+
+    self.connection.executescript(SCHEMA)
+    if self._meta('version') not in (None, str(STORE_VERSION)):
+      logger.warning('Rebuilding graph store with unsupported version: %s', path)
+      with self.connection:
+        self.connection.execute('DELETE FROM notes')
+    with self.connection:
+      self._set_meta('version', str(STORE_VERSION))
+
+  @classmethod
+  def open(cls, path, create=True):
+    """
+    Opens the store at `path`, creating it and its directory unless `create` is False, when it must already exist
+    """
+    if not create and not os.path.exists(path):
+      raise ValueError(f"no graph store at {path}")
+
+    directory = os.path.dirname(path)
+    if directory != '':
+      os.makedirs(directory, exist_ok=True)
+
+    return cls(path)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def close(self):
+    self.connection.close()
+
+  def _meta(self, key):
+    row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return None if row is None else row[0]
+
+  def _set_meta(self, key, value):
+    self.connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+  def __len__(self):
+    return self.connection.execute('SELECT COUNT(*) FROM notes').fetchone()[0]
+
+  def _put(self, note, stat):
+    self.connection.execute('DELETE FROM notes WHERE path = ?', (note.path,))
+    note_id = self.connection.execute('INSERT INTO notes (path, title, size, mtime_ns) VALUES (?, ?, ?, ?)',
+                                      (note.path, note.title, stat.st_size, stat.st_mtime_ns)).lastrowid
+    self.connection.executemany('INSERT INTO aliases (title, note_id) VALUES (?, ?)',
+                                ((other_title, note_id) for other_title in note.other_titles))
+    self.connection.executemany('INSERT INTO links (source_id, title) VALUES (?, ?)',
+                                ((note_id, title) for title in note.find_links()))
+
+  def exclusions(self):
+    """
+    Returns the section labels excluded from the stored notes, or None for a store never updated
+    """
+    settings = self._meta('exclude')
+    return None if settings is None else json.loads(settings)
+
+  def update(self, input_dir, exclusions=None, jobs=1, notes=None, output_dir=None):
+    """
+    Brings the store up to date with the `*.md` notes in `input_dir`, other than those in `output_dir`, with
+    `exclusions` sections removed, by default those the store was last updated with. Only the notes whose size or
+    mtime changed are read again, on `jobs` threads, unless already loaded in `notes`. Returns counts of the notes
+    `added`, `updated`, `removed` and `unchanged`
+    """
+    if exclusions is None:
+      exclusions = self.exclusions() or []
+
+    discovered = discover_notes(input_dir, jobs, output_dir)
+    loaded = {note.path: note for note in notes} if notes is not None else dict()
+    # sections are excluded a label at a time, so the order of the labels matters
+    settings = json.dumps(list(dict.fromkeys(exclusions)))
+
+    with self.connection:
+      if self._meta('exclude') != settings:
+        # the links of every note depend on the sections excluded
+        self.connection.execute('DELETE FROM notes')
+        self._set_meta('exclude', settings)
+
+      stored = {path: (size, mtime_ns) for path, size, mtime_ns in
+                self.connection.execute('SELECT path, size, mtime_ns FROM notes')}
+
+      paths = set(path for path, _ in discovered)
+      removed = [path for path in stored if path not in paths]
+      self.connection.executemany('DELETE FROM notes WHERE path = ?', ((path,) for path in removed))
+
+      changed = [(path, stat) for path, stat in discovered
+                 if stored.get(path, None) != (stat.st_size, stat.st_mtime_ns)]
+
+      def load(path):
+        if path in loaded:
+          return loaded[path]
+
+        logger.debug('Storing %s', path)
+        note = Note(path)
+        note.load(input_dir)
+        exclude_sections_from_notes([note], exclusions)
+        return note
+
+      with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='backlinker-store') as executor:
+        for i in range(0, len(changed), BATCH_SIZE):
+          batch = changed[i:i + BATCH_SIZE]
+          for (path, stat), note in zip(batch, executor.map(load, [path for path, _ in batch])):
+            self._put(note, stat)
+
+    added = sum(1 for path, _ in changed if path not in stored)
+    counts = dict(added=added, updated=len(changed) - added, removed=len(removed),
+                  unchanged=len(discovered) - len(changed))
+    logger.info('Graph store: %d added, %d updated, %d removed, %d unchanged', counts['added'], counts['updated'],
+                counts['removed'], counts['unchanged'])
+
+    return counts
+
+  def resolve(self, title):
+    """
+    Returns the note that `title`, a title or other title, leads to, or None
+    """
+    row = self.connection.execute(
+        'SELECT title, path FROM notes WHERE title = ? UNION ALL '
+        'SELECT notes.title, notes.path FROM aliases JOIN notes ON notes.id = aliases.note_id WHERE aliases.title = ? '
+        'LIMIT 1', (title, title)).fetchone()
+
+    return None if row is None else StoredNote(*row)
+
+  def other_titles(self, title):
+    return [row[0] for row in self.connection.execute(
+        'SELECT aliases.title FROM aliases JOIN notes ON notes.id = aliases.note_id WHERE notes.title = ? '
+        'ORDER BY aliases.title', (title,))]
+
+  def backlinks(self, title):
+    """
+    Returns the notes linking to the note `title` leads to, by its title or any of its other titles, or to `title`
+    itself when no note has it
+    """
+    note = self.resolve(title)
+    titles = [title] if note is None else [note.title, *self.other_titles(note.title)]
+
+    return [Backlink(*row) for row in self.connection.execute(
+        f"SELECT notes.title, notes.path, links.title FROM links JOIN notes ON notes.id = links.source_id "
+        f"WHERE links.title IN ({', '.join('?' * len(titles))}) ORDER BY notes.title, links.title", titles)]
+
+  def dangling(self):
+    """
+    Returns `(title, paths)` for each title linked to without a note, with the paths of the notes linking to it
+    """
+    dangling = dict()
+    for title, path in self.connection.execute(
+        'SELECT links.title, notes.path FROM links JOIN notes ON notes.id = links.source_id '
+        'WHERE NOT EXISTS (SELECT 1 FROM notes AS target WHERE target.title = links.title) '
+        'AND NOT EXISTS (SELECT 1 FROM aliases WHERE aliases.title = links.title) '
+        'ORDER BY links.title, notes.path'):
+      dangling.setdefault(title, []).append(path)
+
+    return list(dangling.items())
+
+  def orphans(self):
+    """
+    Returns the notes that no note links to, by their title or any of their other titles
+    """
+    return [StoredNote(*row) for row in self.connection.execute(
+        'SELECT title, path FROM notes '
+        'WHERE NOT EXISTS (SELECT 1 FROM links WHERE links.title = notes.title) '
+        'AND NOT EXISTS (SELECT 1 FROM aliases JOIN links ON links.title = aliases.title '
+        'WHERE aliases.note_id = notes.id) '
+        'ORDER BY title')]
+
+
+def update_store_from_parameters(parameters, notes_list=None):
+  """
+  Updates the graph store at `store` from the `input` directory as set up by `parameters`, reusing any notes already
+  loaded in `notes_list`. Without `exclude`, the sections excluded when the store was last updated are excluded again
+  """
+  with GraphStore.open(parameters['store']) as store:
+    return store.update(parameters['input'], parameters.get('exclude', None), parameters.get('jobs', 1), notes_list,
+                        parameters.get('output', None))
+
+
+def run_query(parameters):
+  """
+  Answers the `query` set up by `parameters` from the graph store, after updating it when an `input` directory is
+  given, and prints the answer. Without an `input` directory the store must already exist. Returns whether the answer
+  was found
+  """
+  if parameters.get('input', None) is not None:
+    update_store_from_parameters(parameters)
+
+  with GraphStore.open(parameters['store'], create=False) as store:
+    query = parameters['query']
+    title = parameters.get('title', None)
+
+    if query == 'backlinks':
+      note = store.resolve(title)
+      linked_title = title if note is None else note.title
+      answer = [backlink._asdict() for backlink in store.backlinks(title)]
+      lines = [f"{backlink['title']} ({backlink['path']})" +
+               (f" as {backlink['via']}" if backlink['via'] != linked_title else "") for backlink in answer]
+    elif query == 'dangling':
+      answer = [dict(title=title, paths=paths) for title, paths in store.dangling()]
+      lines = [f"{dangling['title']}: {', '.join(dangling['paths'])}" for dangling in answer]
+    elif query == 'orphans':
+      answer = [note._asdict() for note in store.orphans()]
+      lines = [f"{note['title']} ({note['path']})" for note in answer]
+    else:
+      note = store.resolve(title)
+      if note is None:
+        print(f"no note titled '{title}'")
+        return False
+
+      answer = dict(title=title, note=note.title, path=note.path, other_titles=store.other_titles(note.title))
+      lines = [f"{title} -> {note.title} ({note.path})"]
+      if len(answer['other_titles']) > 0:
+        lines.append(f"aka {', '.join(answer['other_titles'])}")
+
+  if parameters.get('json', False):
+    print(json.dumps(answer, indent=2))
+  else:
+    for line in lines:
+      print(line)
+
+  return True
@@ -0,0 +1,147 @@
+"""
+Streaming mode: renders a vault in two passes so that memory grows with the link graph rather than with the size of
+the notes. The first pass keeps only the titles, other titles and links of each note, the second reads each note
+again and renders and writes it before moving on
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .backlinker import (Note, NoteRecord, _default_file_mode, _output_batch, backlink, create_index_notes,
+                         discover_notes, exclude_notes, exclude_sections_from_notes, freeze_links, render_note)
+from .progress import Progress
+from .stats import NullStats, Stats
+
+logger = logging.getLogger(__name__)
+
+# notes are rendered and written this many at a time, which bounds the rendered notes held at once
+BATCH_SIZE = 64
+
+
+def _map(function, items, jobs, name):
+  if jobs > 1:
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix=f'backlinker-{name}') as executor:
+      return list(executor.map(function, items))
+
+  return [function(item) for item in items]
+
+
+def _read_note(input_dir, path, exclusions, stats):
+  note = Note(path)
+  note.load(input_dir)
+  exclude_sections_from_notes([note], exclusions, stats)
+  stats.count('files_read')
+  return note
+
+
+def scan_links(input_dir, exclusions, jobs=1, stats=None, output_dir=None):
+  """
+  First pass: reads every note in `input_dir`, other than those in `output_dir`, with `exclusions` sections removed,
+  keeping only its path, titles and links. The notes returned have no frontmatter or content
+  """
+  stats = stats or NullStats()
+  paths = [path for path, _ in discover_notes(input_dir, jobs, output_dir)]
+
+  with Progress('Scanning', len(paths)) as progress:
+
+    def scan(path):
+      logger.debug('Scanning %s', path)
+      note = _read_note(input_dir, path, exclusions, stats)
+      progress.update()
+      return Note.from_record(NoteRecord(note.path, note.title, note.other_titles, None, '', note.find_links()))
+
+    return _map(scan, paths, jobs, 'scan')
+
+
+def render_and_output(input_dir, output_dir, graph, scanned, parameters, stats=None):
+  """
+  Second pass: renders every note of `graph` and writes it to `output_dir`, a batch at a time. The content of each
+  note in `scanned` is read again from `input_dir` and rewritten on the way
+  """
+  exclusions = parameters['exclude']
+  rewrite_as_links = parameters['rewrite_as_links']
+  render_frontmatter = parameters['render_frontmatter']
+  jobs = parameters.get('jobs', 1)
+  fsync = parameters.get('fsync', False)
+  stats = stats or NullStats()
+
+  notes, links = graph
+  aliases = graph.aliases
+  files = {note.path: note for note in scanned}
+
+  links_by_source = dict()
+  for link in links.values():
+    for source in link.sources:
+      links_by_source.setdefault(source, dict())[link.title] = link
+
+  def render(note):
+    link = links.get(note.title, None)
+    other_title_links = [aliases[other_title] for other_title in note.other_titles if other_title in aliases]
+
+    if files.get(note.path, None) is note:
+      # links are held by the note as scanned, the content is read again to rewrite them in
+      source_links = links_by_source.get(note, None)
+      note = _read_note(input_dir, note.path, exclusions, stats)
+      if source_links is not None:
+        note.content, rewritten = note.tokens.rewrite(source_links, rewrite_as_links, note.path)
+        stats.count('regex_substitutions', rewritten)
+
+    return note.path, render_note(note, link, other_title_links, rewrite_as_links, render_frontmatter)
+
+  default_mode = _default_file_mode()
+  totals = [0, 0, 0]
+  ordered = list(notes.values())
+  with Progress('Rendering', len(ordered)) as progress:
+    for i in range(0, len(ordered), BATCH_SIZE):
+      batch = _map(render, ordered[i:i + BATCH_SIZE], jobs, 'render')
+      counts = _output_batch(batch, output_dir, default_mode, fsync, stats)
+      totals = [total + count for total, count in zip(totals, counts)]
+      progress.update(len(batch))
+
+  written, skipped, new = totals
+  logger.info('Output: %d written, %d unchanged, %d new', written, skipped, new)
+  stats.count('files_written', written + new)
+
+  return dict(written=written, skipped=skipped, new=new)
+
+
+def run_streaming(parameters):
+  """
+  Backlinks, renders and writes out the notes as set up by `parameters` in two passes over the vault, writing the
+  same notes as `run_backlinker`. Returns the timings and counters of the run, see `Stats.as_dict`
+  """
+  input_dir = parameters['input']
+  exclusions = parameters['exclude']
+  rewrite_as_links = parameters['rewrite_as_links']
+  stats = Stats()
+
+  with stats.stage('scan'):
+    scanned = scan_links(input_dir, exclusions, parameters.get('jobs', 1), stats, parameters['output'])
+  stats.set('notes', len(scanned))
+  stats.set('aliases', sum(len(note.other_titles) for note in scanned))
+
+  with stats.stage('backlink'):
+    graph = backlink(scanned)
+  stats.set('links', len(graph.links))
+
+  if len(exclusions) > 0:
+    with stats.stage('exclude_notes'):
+      excluded = exclude_notes(graph.notes, graph.links, exclusions, graph.index, parameters.get('exclude_depth', 1))
+    logger.info('Excluded %d notes (%d links)', len(graph.notes) - len(excluded.notes),
+                len(graph.links) - len(excluded.links))
+    stats.set('redactions', len(excluded.exclusion_report.redacted))
+    graph = excluded
+
+  freeze_links(graph.links)
+
+  if parameters['render_index']:
+    with stats.stage('create_index'):
+      create_index_notes(graph.notes, rewrite_as_links, parameters.get('shard_index', False))
+
+  with stats.stage('render_and_output'):
+    render_and_output(input_dir, parameters['output'], graph, scanned, parameters, stats)
+
+  if parameters.get('stats', False):
+    print(stats.report())
+
+  return stats.as_dict()
@@ -0,0 +1,102 @@
+"""
+Generates synthetic vaults of backlinker notes, for benchmarking how each stage scales
+"""
+
+import argparse
+import os
+import random
+
+WORDS = ("the cat sat on a mat while the dog chased some mice across an old ship deck and every kitten "
+         "watched from the warm galley hoping for food").split()
+
+SECTION_LABEL = 'Private'
+
+
+def _filler(rng, size):
+  words = []
+  length = 0
+  while length < size:
+    word = rng.choice(WORDS)
+    words.append(word)
+    length += len(word) + 1
+
+  return " ".join(words)
+
+
+def generate_vault(output_dir, notes=1000, links_per_note=5, alias_ratio=0.1, section_frequency=0.05,
+                   note_size=1000, private_ratio=0.01, seed=0):
+  """
+  Writes `notes` notes to `output_dir` and returns the list of file names.
+
+  Each note links to about `links_per_note` other titles, `alias_ratio` of notes have an `aka` alias, about
+  `section_frequency` of paragraphs are wrapped in a `Private` section, bodies are about `note_size` characters, and
+  `private_ratio` of notes are tagged [[Private]]. The same `seed` always generates the same vault
+  """
+  rng = random.Random(seed)
+
+  titles = [f"Note {i}" for i in range(notes)]
+  aliases = {title: f"Alias of {title}" for title in titles if rng.random() < alias_ratio}
+  targets = titles + list(aliases.values())
+
+  os.makedirs(output_dir, exist_ok=True)
+
+  paths = []
+  for title in titles:
+    paragraphs = []
+    paragraph_count = max(1, note_size // 250)
+    for _ in range(paragraph_count):
+      paragraph = _filler(rng, note_size // paragraph_count)
+      if rng.random() < section_frequency:
+        paragraph = f"<!-- {SECTION_LABEL} -->\n{paragraph}\n<!-- End {SECTION_LABEL} -->"
+      paragraphs.append(paragraph)
+
+    # scatter the links through the paragraphs, sometimes with a display alias
+    for _ in range(rng.randint(0, 2 * links_per_note)):
+      target = rng.choice(targets)
+      link = f"[[{target}|{target.lower()}]]" if rng.random() < 0.1 else f"[[{target}]]"
+      i = rng.randrange(len(paragraphs))
+      paragraphs[i] = f"{paragraphs[i]} {link}"
+
+    tags = "tags [[Synthetic]]"
+    if rng.random() < private_ratio:
+      tags += f" [[{SECTION_LABEL}]]"
+
+    lines = ["---", f"title: {title}", "---", "", f"# {title}", ""]
+    if title in aliases:
+      lines.append(f"aka [[{aliases[title]}]]")
+    lines.append(tags)
+    lines.append("")
+    lines.append("\n\n".join(paragraphs))
+
+    path = f"{title}.md"
+    with open(os.path.join(output_dir, path), 'w') as f:
+      f.write("\n".join(lines) + "\n")
+    paths.append(path)
+
+  return paths
+
+
+def argument_parser():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--output', type=str, required=True, help='directory to write the synthetic notes into')
+  parser.add_argument('--notes', type=int, default=1000, help='number of notes (default 1000)')
+  parser.add_argument('--links-per-note', type=int, default=5, help='average number of links in each note (default 5)')
+  parser.add_argument('--alias-ratio', type=float, default=0.1, help='fraction of notes with an alias (default 0.1)')
+  parser.add_argument('--section-frequency', type=float, default=0.05,
+                      help=f'fraction of paragraphs in a {SECTION_LABEL} section (default 0.05)')
+  parser.add_argument('--note-size', type=int, default=1000, help='approximate characters in each note body (default 1000)')
+  parser.add_argument('--private-ratio', type=float, default=0.01,
+                      help=f'fraction of notes tagged [[{SECTION_LABEL}]] (default 0.01)')
+  parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+  return parser
+
+
+def main():
+  args = argument_parser().parse_args()
+  paths = generate_vault(args.output, args.notes, args.links_per_note, args.alias_ratio, args.section_frequency,
+                         args.note_size, args.private_ratio, args.seed)
+  print(f'Generated {len(paths)} notes in {args.output}')
+
+
+if __name__ == "__main__":
+  main()
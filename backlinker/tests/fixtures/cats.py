@@ -8,7 +8,7 @@ def note_cats():
   with open(os.path.join(os.path.dirname(__file__), 'cats/Cats.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  note = Note("test/path/Cats.md")
+  note = Note("Cats.md")
   note.title = "Cats"
   note.frontmatter = '''created: "2020-03-18T12:31:33.886Z"
 modified: "2020-03-24T00:06:13.163Z"
@@ -91,7 +91,7 @@ def note_drafts():
   with open(os.path.join(os.path.dirname(__file__), 'cats/Drafts.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  note = Note("test/path/Drafts.md")
+  note = Note("Drafts.md")
   note.title = "Drafts"
   note.frontmatter = """created: "2020-03-18T12:31:33.886Z"
 modified: "2020-03-24T00:06:13.163Z"
@@ -121,7 +121,7 @@ def note_kittens():
   with open(os.path.join(os.path.dirname(__file__), 'cats/Kittens.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  note = Note("test/path/Kittens.md")
+  note = Note("Kittens.md")
   note.title = "Kittens"
   note.frontmatter = """created: "2020-03-18T12:31:33.886Z"
 modified: "2020-03-24T00:06:13.163Z"
@@ -154,7 +154,7 @@ def note_ships_cat():
   with open(os.path.join(os.path.dirname(__file__), 'cats/Ship\'s Cat.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  note = Note("test/path/Ship\'s Cat.md")
+  note = Note("Ship\'s Cat.md")
   note.title = "Ship\'s Cat"
   note.frontmatter = """created: "2020-03-18T12:31:33.886Z"
 modified: "2020-03-24T00:06:13.163Z"
@@ -190,7 +190,7 @@ TODO: Write about cats on ships here.
 
 
 def blank_note(title):
-  note = Note(f"test/path/{title}.md")
+  note = Note(f"{title}.md")
   note.title = title
 
   link = Link(note.title)
@@ -10,7 +10,7 @@ def example_note_one():
   with open(os.path.join(os.path.dirname(__file__), 'notes/note_one.md'), 'r') as f:
     file_contents = f.read()
 
-  expected = Note("test/path/note_one.md")
+  expected = Note("note_one.md")
   expected.title = "Note 1"
   expected.frontmatter = """created: "2020-03-18T12:31:33.886Z"
 modified: "2020-03-24T00:06:13.163Z"
@@ -49,7 +49,7 @@ def example_note_two():
   with open(os.path.join(os.path.dirname(__file__), 'notes/note_two.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  expected = Note("test/path/note_two.md")
+  expected = Note("note_two.md")
   expected.title = "Note 2"
   expected.frontmatter = '''tags: [Notebooks/My Notes]
 title: Note 2
@@ -87,7 +87,7 @@ def example_note_three():
   with open(os.path.join(os.path.dirname(__file__), 'notes/note_three.md'), 'r') as f:
     file_contents = f.read().rstrip() + '\n'
 
-  expected = Note("test/path/note_three.md")
+  expected = Note("note_three.md")
   expected.title = "Note 3"
   expected.frontmatter = '''tags: [Notebooks/My Notes]
 title: Note 3
@@ -1,4 +1,4 @@
-from ..backlinker import backlink
+from ..backlinker import Note, backlink, freeze_links
 
 from . import fixtures
 from .fixtures.notes import example_notes, example_note_one, example_note_two, example_note_three
@@ -27,3 +27,38 @@ def test_backlink_notes(example_notes):
 
 def test_backlink_cats(fixture_cats):
   _test_backlink(fixture_cats)
+
+
+def test_backlink_aliases(fixture_cats):
+  graph = backlink(list(fixture_cats["notes"].values()))
+
+  # 'Felis catus' is never linked to and so has no Link
+  assert graph.aliases == {
+      "Cat": graph.links["Cat"],
+      "Kitten": graph.links["Kitten"]
+  }
+
+
+def test_freeze_links(fixture_cats):
+  notes, links = backlink(list(fixture_cats["notes"].values()))
+  sources = {title: set(link.sources) for title, link in links.items()}
+
+  freeze_links(links)
+
+  for title, link in links.items():
+    assert isinstance(link.sources, tuple)
+    assert set(link.sources) == sources[title]
+    assert list(link.sources) == sorted(link.sources, key=lambda note: note.title)
+
+
+def test_backlink_titles_interned():
+  one = Note("one.md")
+  one.parse("---\n---\n# One\n\n[[Shared Title]]")
+  two = Note("two.md")
+  two.parse("---\n---\n# Two\n\n[[Shared Title]]")
+
+  notes, links = backlink([one, two])
+
+  link = links["Shared Title"]
+  assert link.title is next(iter(one.find_links())) is next(iter(two.find_links()))
+  assert link.destination.title is link.title
@@ -0,0 +1,87 @@
+import glob
+import os
+
+import pytest
+
+from ..backlinker import Note
+from ..check import check_vault, find_problems, scan_note, NoteHeader
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _write(directory, name, content):
+  with open(os.path.join(directory, name), 'w') as f:
+    f.write(content)
+
+
+@pytest.mark.parametrize('fixture', ['cats', 'notes'])
+def test_scan_note_matches_load(fixture):
+  input_dir = os.path.join(FIXTURES, fixture)
+  for path in sorted(os.path.basename(path) for path in glob.glob(os.path.join(input_dir, "*.md"))):
+    note = Note(path)
+    note.load(input_dir)
+
+    header = scan_note(input_dir, path)
+
+    assert header.title == note.title
+    assert header.other_titles == note.other_titles
+    assert header.links == note.find_links()
+
+
+@pytest.mark.parametrize('content', [
+    "# Cats\n\naka [[Felines]]\n\nSee [[Dogs]]\n",
+    "# Cats\n\n\naka [[Felines]]\n\nSee [[Dogs]]\n",
+    "# Cats\n\n\naka [[Felines]]\nSee [[Dogs]]\n",
+    "# Cats\nSee [[Dogs]]\n"
+])
+def test_scan_note_matches_load_for_aka_layouts(tmp_path, content):
+  _write(tmp_path, 'Cats.md', "---\n---\n" + content)
+  note = Note('Cats.md')
+  note.load(tmp_path)
+
+  header = scan_note(tmp_path, 'Cats.md')
+
+  assert header == NoteHeader('Cats.md', note.title, note.other_titles, note.find_links())
+
+
+def test_scan_note_stops_at_rendered_backlinks(tmp_path):
+  _write(tmp_path, 'note.md', "---\ntitle: Note\n---\n\n# Note\n\naka [[Alias]]\n\n"
+         "a link to [[Other]]\n\n<!-- begin backlinker content -->\n\n[[Rendered Backlink]]\n")
+
+  header = scan_note(tmp_path, 'note.md')
+
+  assert header == NoteHeader('note.md', "Note", {"Alias"}, {"Other"})
+
+
+def test_find_problems():
+  headers = [
+      NoteHeader('a.md', "A", {"Shared Alias"}, {"B", "Tag"}),
+      NoteHeader('b.md', "B", {"Shared Alias"}, {"Missing", "A"}),
+      NoteHeader('c.md', "A", {}, {"Shared Alias", "Missing"})
+  ]
+
+  assert find_problems(headers, allowed_dangling=["Tag"]) == [
+      "note title 'A' occurs more than once: a.md, c.md",
+      "note other title 'Shared Alias' occurs more than once: a.md, b.md",
+      "link to 'Missing' has no note: b.md, c.md"
+  ]
+
+
+def test_check_vault(tmp_path):
+  _write(tmp_path, 'one.md', "---\n---\n# One\n\n[[Two]] [[Nowhere]]")
+  _write(tmp_path, 'two.md', "---\n---\n# Two\n\naka [[Deux]]\n\n[[One]]")
+  _write(tmp_path, 'three.md', "---\n---\n# Two\n\n[[Deux]]")
+  _write(tmp_path, 'broken.md', "no frontmatter")
+
+  problems = check_vault(tmp_path, jobs=2)
+
+  assert problems == [
+      "unable to read note: broken.md: list index out of range",
+      "note title 'Two' occurs more than once: three.md, two.md",
+      "link to 'Nowhere' has no note: one.md"
+  ]
+  assert sorted(os.listdir(tmp_path)) == ['broken.md', 'one.md', 'three.md', 'two.md']
+
+
+def test_check_consistent_vault():
+  assert check_vault(os.path.join(FIXTURES, 'cats'), allowed_dangling=["Animals", "Categories", "Dogs", "Mice"]) == []
@@ -2,7 +2,8 @@
 import argparse
 import pytest
 
-from ..cli import argument_parser, validate_arguments
+from ..cli import (argument_parser, query_argument_parser, serve_argument_parser, validate_arguments,
+                   validate_query_arguments, validate_serve_arguments)
 
 
 def test_minimal_arguments():
@@ -15,12 +16,26 @@ def test_minimal_arguments():
   parameters = validate_arguments(args)
 
   assert parameters == {
+      'allow_dangling': [],
+      'cache': True,
+      'check': False,
+      'cache_dir': None,
       'exclude': [],
+      'exclude_depth': 1,
+      'fsync': False,
       'input': 'backlinker/tests/fixtures/cats/',
+      'jobs': 1,
       'output': 'backlinker/tests/fixtures/notes/',
+      'processes': False,
       'render_frontmatter': True,
       'render_index': False,
-      'rewrite_as_links': False
+      'rewrite_as_links': False,
+      'shard_index': False,
+      'stats': False,
+      'store': None,
+      'stream': False,
+      'watch': False,
+      'watch_interval': 0.5
   }
 
 
@@ -34,12 +49,26 @@ def test_normal_arguments():
   parameters = validate_arguments(args)
 
   assert parameters == {
+      'allow_dangling': [],
+      'cache': True,
+      'check': False,
+      'cache_dir': None,
       'exclude': [],
+      'exclude_depth': 1,
+      'fsync': False,
       'input': 'backlinker/tests/fixtures/cats/',
+      'jobs': 1,
       'output': 'backlinker/tests/fixtures/notes/',
+      'processes': False,
       'render_frontmatter': False,
       'render_index': True,
-      'rewrite_as_links': True
+      'rewrite_as_links': True,
+      'shard_index': False,
+      'stats': False,
+      'store': None,
+      'stream': False,
+      'watch': False,
+      'watch_interval': 0.5
   }
 
 
@@ -76,12 +105,26 @@ def test_in_place():
   parameters = validate_arguments(args)
 
   assert parameters == {
+      'allow_dangling': [],
+      'cache': True,
+      'check': False,
+      'cache_dir': None,
       'exclude': [],
+      'exclude_depth': 1,
+      'fsync': False,
       'input': 'backlinker/tests/fixtures/cats/',
+      'jobs': 1,
       'output': 'backlinker/tests/fixtures/cats/',
+      'processes': False,
       'render_frontmatter': True,
       'render_index': False,
-      'rewrite_as_links': False
+      'rewrite_as_links': False,
+      'shard_index': False,
+      'stats': False,
+      'store': None,
+      'stream': False,
+      'watch': False,
+      'watch_interval': 0.5
   }
 
 
@@ -94,12 +137,26 @@ def test_in_place_with_index():
   parameters = validate_arguments(args)
 
   assert parameters == {
+      'allow_dangling': [],
+      'cache': True,
+      'check': False,
+      'cache_dir': None,
       'exclude': [],
+      'exclude_depth': 1,
+      'fsync': False,
       'input': 'backlinker/tests/fixtures/cats/',
+      'jobs': 1,
       'output': 'backlinker/tests/fixtures/cats/',
+      'processes': False,
       'render_frontmatter': True,
       'render_index': True,
-      'rewrite_as_links': False
+      'rewrite_as_links': False,
+      'shard_index': False,
+      'stats': False,
+      'store': None,
+      'stream': False,
+      'watch': False,
+      'watch_interval': 0.5
   }
 
 
@@ -134,3 +191,136 @@ def test_same_input_and_output():
     parameters = validate_arguments(args)
 
   assert '--in-place' in str(e.value) and '--input' in str(e.value) and '--output' in str(e.value)
+
+
+def test_jobs():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--jobs', '4']
+
+  parser = argument_parser()
+  args = parser.parse_args(argv)
+
+  parameters = validate_arguments(args)
+
+  assert parameters['jobs'] == 4
+
+
+def test_jobs_must_be_positive():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--jobs', '0']
+
+  with pytest.raises(SystemExit) as e:
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+
+
+def test_quiet_and_verbose():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--quiet', '--verbose']
+
+  with pytest.raises(SystemExit) as e:
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+
+
+def test_exclude_depth():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--exclude', 'Drafts', '--exclude-depth', '3']
+
+  parser = argument_parser()
+  args = parser.parse_args(argv)
+
+  parameters = validate_arguments(args)
+
+  assert parameters['exclude_depth'] == 3
+
+
+def test_exclude_transitive():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--exclude', 'Drafts', '--exclude-transitive']
+
+  parser = argument_parser()
+  args = parser.parse_args(argv)
+
+  parameters = validate_arguments(args)
+
+  assert parameters['exclude_depth'] is None
+
+
+def test_exclude_depth_and_transitive():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--exclude-depth', '2', '--exclude-transitive']
+
+  with pytest.raises(SystemExit) as e:
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+
+
+def test_serve_arguments():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--socket', '/tmp/backlinker.sock', '--rewrite-as-links']
+
+  parser = serve_argument_parser()
+  args = parser.parse_args(argv)
+
+  parameters = validate_serve_arguments(args)
+
+  assert parameters == {
+      'cache': True,
+      'cache_dir': None,
+      'exclude': [],
+      'input': 'backlinker/tests/fixtures/cats/',
+      'jobs': 1,
+      'render_frontmatter': True,
+      'rewrite_as_links': True,
+      'socket': '/tmp/backlinker.sock',
+      'watch_interval': 0.5
+  }
+
+
+def test_serve_missing_socket():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/']
+
+  with pytest.raises(SystemExit) as e:
+    parser = serve_argument_parser()
+    args = parser.parse_args(argv)
+
+
+def test_query_arguments():
+  argv = ['--store', 'graph.db', '--json', 'backlinks', 'Cats']
+
+  parser = query_argument_parser()
+  args = parser.parse_args(argv)
+
+  assert validate_query_arguments(args) == {
+      'exclude': None,
+      'input': None,
+      'jobs': 1,
+      'json': True,
+      'query': 'backlinks',
+      'store': 'graph.db',
+      'title': 'Cats'
+  }
+
+
+def test_query_requires_a_query():
+  argv = ['--store', 'graph.db']
+
+  with pytest.raises(SystemExit) as e:
+    parser = query_argument_parser()
+    args = parser.parse_args(argv)
+
+
+def test_stream_with_watch():
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--in-place', '--stream', '--watch']
+
+  parser = argument_parser()
+  args = parser.parse_args(argv)
+
+  with pytest.raises(ValueError) as e:
+    parameters = validate_arguments(args)
+
+
+@pytest.mark.parametrize('option', [['--store', 'graph.db'], ['--stats']])
+def test_watch_with_store_or_stats(option):
+  argv = ['--input', 'backlinker/tests/fixtures/cats/', '--output', 'backlinker/tests/fixtures/notes/', '--watch',
+          *option]
+
+  parser = argument_parser()
+  args = parser.parse_args(argv)
+
+  with pytest.raises(ValueError) as e:
+    parameters = validate_arguments(args)
@@ -1,4 +1,4 @@
-from ..backlinker import Note, create_index_note
+from ..backlinker import Note, create_index_note, create_index_notes, render_links_in_content
 
 import pytest
 
@@ -41,3 +41,43 @@ def test_create_cats_index(fixture_cats, fixture_cats_index):
   assert index.content == fixture_cats_index["note"].content
 
   assert len(list(filter(lambda link: link.sources != {index}, index_links))) == 0
+
+
+@pytest.mark.parametrize('rewrite_as_links', [False, True])
+def test_create_index_notes_matches_rewritten_index(fixture_cats, rewrite_as_links):
+  rewritten = dict(fixture_cats["notes"])
+  index_links = create_index_note(rewritten)
+  render_links_in_content(index_links, rewrite_as_links)
+
+  notes = dict(fixture_cats["notes"])
+  index_notes = create_index_notes(notes, rewrite_as_links)
+
+  assert index_notes == [notes["Index"]]
+  assert notes["Index"].content == rewritten["Index"].content
+
+
+def test_create_sharded_index_notes(fixture_cats):
+  notes = dict(fixture_cats["notes"])
+
+  index_notes = create_index_notes(notes, False, shard=True)
+
+  titles = [note.title for note in index_notes]
+  assert titles == ["Index", "Index - A", "Index - C", "Index - D", "Index - F", "Index - K", "Index - M", "Index - S"]
+  for note in index_notes:
+    assert notes[note.title] is note
+
+  assert notes["Index"].content.splitlines()[:2] == ["- [[Index - A]]", "- [[Index - C]]"]
+  assert notes["Index - K"].content == "## K\n\n- [[Kitten|Kittens]] _Kittens_\n- [[Kittens]]\n\n"
+
+
+def test_sharded_index_non_letter_titles():
+  notes = dict()
+  for title in ["[Bracketed]", "/slashed", "Plain"]:
+    note = Note(f"{title}.md")
+    note.title = title
+    notes[title] = note
+
+  index_notes = create_index_notes(notes, True, shard=True)
+
+  assert [note.path for note in index_notes] == ["Index.md", "Index - #.md", "Index - P.md"]
+  assert "- [Index - #](Index%20-%20%23.md)" in notes["Index"].content
@@ -1,4 +1,4 @@
-from ..backlinker import exclude_notes
+from ..backlinker import Note, backlink, exclude_notes
 
 from . import fixtures
 from .fixtures.notes import example_notes, example_note_one, example_note_two, example_note_three
@@ -86,3 +86,94 @@ def test_exclude_drafts_from_cats(fixture_cats):
 
   assert len(links_to_redacted) == 1  # Ship's Cat
   assert links_to_redacted[0].sources == {fixture_cats["Cats"]["note"]}
+
+
+def test_exclude_aliases(example_notes):
+
+  graph = exclude_notes(example_notes['notes'], example_notes['links'], {"Secret"})
+
+  assert graph.aliases == {"Note 1 Alias": graph.links["Note 1 Alias"]}
+
+
+def test_exclusion_report(example_notes):
+
+  graph = exclude_notes(example_notes['notes'], example_notes['links'], {"Note 2"})
+
+  report = graph.exclusion_report
+  assert report.excluded == ["Note 2"]
+  assert report.referencing == {"Note 2": ["Note 1"]}
+  assert "Note 2" in report.removed_links
+  assert report.redacted == ["Note 1"]
+
+
+def test_exclude_leaves_links_unchanged(fixture_cats):
+  sources = {title: set(link.sources) for title, link in fixture_cats['links'].items()}
+  destinations = {title: link.destination for title, link in fixture_cats['links'].items()}
+
+  notes, links = exclude_notes(fixture_cats['notes'], fixture_cats['links'], {"Drafts"})
+
+  for title, link in fixture_cats['links'].items():
+    assert link.sources == sources[title]
+    assert link.destination is destinations[title]
+
+
+def test_exclude_with_backlink_index(fixture_cats):
+  graph = backlink(list(fixture_cats['notes'].values()))
+
+  indexed = exclude_notes(graph.notes, graph.links, {"Drafts"}, graph.index)
+  unindexed = exclude_notes(graph.notes, graph.links, {"Drafts"})
+
+  assert indexed.notes.keys() == unindexed.notes.keys()
+  assert indexed.links.keys() == unindexed.links.keys()
+  for title, link in indexed.links.items():
+    assert link.sources == unindexed.links[title].sources
+    assert link.destination.title == unindexed.links[title].destination.title
+  assert indexed.exclusion_report == unindexed.exclusion_report
+
+
+def _chain_graph():
+  # Secret <- A <- B <- C (through an alias of B) <- D
+  contents = {
+      "A": "[[Secret]]",
+      "B": "aka [[Bee]]\n\nlinks to [[A]]",
+      "C": "links to [[Bee]]",
+      "D": "links to [[C]]",
+      "E": "unrelated"
+  }
+  notes_list = []
+  for title, content in contents.items():
+    note = Note(f"{title}.md")
+    note.parse(f"---\n---\n# {title}\n\n{content}")
+    notes_list.append(note)
+
+  return backlink(notes_list)
+
+
+def test_exclude_depth_one_is_direct():
+  graph = _chain_graph()
+
+  notes, links = exclude_notes(graph.notes, graph.links, ["Secret"], graph.index, depth=1)
+
+  assert set(notes) == {"B", "C", "D", "E", "REDACTED"}
+  assert links["A"].destination.title == "REDACTED"
+
+
+def test_exclude_depth_follows_aliases():
+  graph = _chain_graph()
+
+  notes, links = exclude_notes(graph.notes, graph.links, ["Secret"], graph.index, depth=3)
+
+  # C links to B by its other title, and the links to C are redacted at the boundary
+  assert set(notes) == {"D", "E", "REDACTED"}
+  assert links["C"].destination.title == "REDACTED"
+  assert links["C"].sources == {graph.notes["D"]}
+  assert "A" not in links and "Bee" not in links
+
+
+def test_exclude_transitive():
+  graph = _chain_graph()
+
+  notes, links = exclude_notes(graph.notes, graph.links, ["Secret"], graph.index, depth=None)
+
+  assert set(notes) == {"E"}
+  assert links == {}
@@ -1,3 +1,4 @@
+import logging
 from unittest.mock import patch, mock_open
 
 from ..backlinker import Note, exclude_sections_from_notes
@@ -114,3 +115,64 @@ Opening section line should not match
   exclude_sections_from_notes([note], ["SECTION"])
 
   assert note.content == expected_content
+
+
+def test_exclude_many_sections_and_labels():
+  note = Note("test.md")
+  note.title = "Test"
+  note.content = "".join(f"keep {i}\n<!-- A -->\nsecret {i}\n<!-- End A -->\n<!-- B -->\nprivate {i}\n<!-- End B -->\n"
+                         for i in range(2000))
+
+  exclude_sections_from_notes([note], ["A", "B"])
+
+  assert note.content == "".join(f"keep {i}\n\n\n" for i in range(2000))
+
+
+def test_exclude_sections_nested_in_another_label():
+  note = Note("test.md")
+  note.title = "Test"
+  note.content = "before\n<!-- A -->\nouter <!-- B -->inner<!-- End B --> outer\n<!-- End A -->\nafter"
+
+  exclude_sections_from_notes([note], ["B", "A"])
+
+  assert note.content == "before\n\nafter"
+
+
+def test_exclude_sections_after_unclosed_section_of_another_label():
+  note = Note("test.md")
+  note.title = "Test"
+  note.content = "intro <!-- Drafts --> never closed\n\n<!-- Private -->my password<!-- End Private -->"
+
+  exclude_sections_from_notes([note], ["Private", "Drafts"])
+
+  assert note.content == "intro <!-- Drafts --> never closed\n\n"
+
+
+def test_exclude_overlapping_sections_in_order_given():
+  content = "a <!-- A -->1 <!-- B -->2<!-- End A --> 3<!-- End B --> b"
+
+  note = Note("test.md")
+  note.title = "Test"
+  note.content = content
+  exclude_sections_from_notes([note], ["A", "B"])
+
+  assert note.content == "a  3<!-- End B --> b"
+
+  note.content = content
+  exclude_sections_from_notes([note], ["B", "A"])
+
+  assert note.content == "a <!-- A -->1  b"
+
+
+def test_exclude_sections_logs_characters(caplog):
+  note = Note("test.md")
+  note.title = "Test"
+  note.content = "keep <!-- A -->abc<!-- End A --> keep <!-- B -->de<!-- End B -->"
+
+  with caplog.at_level(logging.DEBUG, logger='backlinker'):
+    exclude_sections_from_notes([note], ["B", "A"])
+
+  assert [record.getMessage() for record in caplog.records] == [
+      "Excluding 'A' section from Test (27 characters)",
+      "Excluding 'B' section from Test (26 characters)"
+  ]
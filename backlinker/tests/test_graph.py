@@ -0,0 +1,69 @@
+from ..backlinker import backlink
+from ..graph import LinkIndex
+
+from .fixtures.cats import fixture_cats
+
+
+def test_link_index_titles(fixture_cats):
+  index = LinkIndex(list(fixture_cats["notes"].values()))
+
+  assert index.titles == sorted(index.titles)
+  assert set(index.titles) == set(fixture_cats["links"]).union(
+      *[{note.title, *note.other_titles} for note in fixture_cats["notes"].values()])
+  for title in index.titles:
+    assert index.titles[index.id_of(title)] == title
+
+  assert index.id_of("Not A Title") == -1
+
+
+def test_link_index_destinations(fixture_cats):
+  index = LinkIndex(list(fixture_cats["notes"].values()))
+
+  cats = index.id_of("Cats")
+  assert index.notes[cats] is fixture_cats["notes"]["Cats"]
+  assert index.destinations[cats] == cats
+  assert index.destinations[index.id_of("Cat")] == cats
+  assert index.destinations[index.id_of("Kitten")] == index.id_of("Kittens")
+
+
+def test_link_index_dangling_title(fixture_cats):
+  notes_list = [note for note in fixture_cats["notes"].values() if note.title != "Animals"]
+  index = LinkIndex(notes_list)
+
+  animals = index.id_of("Animals")
+  assert index.notes[animals] is None
+  assert index.destinations[animals] == -1
+
+
+def test_link_index_edges(fixture_cats):
+  index = LinkIndex(list(fixture_cats["notes"].values()))
+
+  for title_id, note in enumerate(index.notes):
+    if note is not None:
+      assert [index.titles[target] for target in index.targets(title_id)] == sorted(note.find_links())
+
+  for title, link in fixture_cats["links"].items():
+    sources = index.sources(index.id_of(title))
+    assert list(sources) == sorted(sources)
+    assert set(index.notes[source] for source in sources) == link.sources
+
+    for source in sources:
+      assert index.id_of(title) in index.targets(source)
+
+
+def test_backlink_keeps_index(fixture_cats):
+  graph = backlink(list(fixture_cats["notes"].values()))
+
+  assert isinstance(graph.index, LinkIndex)
+  assert set(graph.links) == set(title for title_id, title in enumerate(graph.index.titles)
+                                 if len(graph.index.sources(title_id)) > 0)
+
+
+def test_backlinked_within(fixture_cats):
+  index = LinkIndex(list(fixture_cats["notes"].values()))
+
+  # Ship's Cat links to Drafts, Cats links to Ship's Cat, and Kittens links to Cats by its other title Cat
+  assert [index.titles[note_id] for note_id in index.backlinked_within(["Drafts"], 1)] == ["Ship's Cat"]
+  assert [index.titles[note_id] for note_id in index.backlinked_within(["Drafts"], 2)] == ["Ship's Cat", "Cats"]
+  assert [index.titles[note_id] for note_id in index.backlinked_within(["Drafts"])] == ["Ship's Cat", "Cats", "Kittens"]
+  assert index.backlinked_within(["Not A Title"]) == []
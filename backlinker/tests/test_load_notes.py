@@ -0,0 +1,78 @@
+import os.path
+
+from ..backlinker import discover_notes, exclude_sections_from_notes, load_notes, parse_notes
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _summarise(notes):
+  return list(map(lambda n: (n.path, n.title, n.other_titles, n.frontmatter, n.content), notes))
+
+
+def test_load_notes_sorted_by_path():
+
+  notes = load_notes(os.path.join(fixtures_dir, 'cats'))
+
+  assert list(map(lambda n: n.path, notes)) == ["Cats.md", "Drafts.md", "Kittens.md", "Ship's Cat.md"]
+
+
+def test_load_notes_with_jobs_matches_serial():
+
+  for fixture in ['cats', 'notes']:
+    input_dir = os.path.join(fixtures_dir, fixture)
+
+    serial = load_notes(input_dir)
+    threaded = load_notes(input_dir, jobs=3)
+
+    assert _summarise(threaded) == _summarise(serial)
+
+
+def test_parse_notes_matches_load_and_exclude():
+
+  input_dir = os.path.join(fixtures_dir, 'cats')
+  exclusions = ["Drafts", "TODO"]
+
+  loaded = load_notes(input_dir)
+  exclude_sections_from_notes(loaded, exclusions)
+
+  parsed = parse_notes(input_dir, exclusions, jobs=2, batch_size=1)
+
+  assert _summarise(parsed) == _summarise(loaded)
+  assert list(map(lambda n: n.find_links(), parsed)) == list(map(lambda n: n.find_links(), loaded))
+  assert "Mice" not in parsed[0].find_links()  # only linked from the excluded Drafts section
+
+
+def _write_nested_vault(root):
+  for path in ["Top.md", "a/Alpha.md", "a/b/Beta.md", ".hidden/Hidden.md", "a/.Draft.md", "a/notes.txt"]:
+    full_path = root / path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    title = os.path.splitext(os.path.basename(path))[0]
+    full_path.write_text(f"---\n---\n# {title}\n\nSee [[Top]]")
+
+
+def test_discover_notes_in_folders(tmp_path):
+  _write_nested_vault(tmp_path)
+
+  discovered = discover_notes(str(tmp_path))
+
+  assert [path for path, _ in discovered] == ["Top.md", "a/Alpha.md", "a/b/Beta.md"]
+  assert all(stat.st_size == os.path.getsize(tmp_path / path) for path, stat in discovered)
+  assert discover_notes(str(tmp_path), jobs=3) == discovered
+
+
+def test_discover_notes_skips_linked_folders(tmp_path):
+  _write_nested_vault(tmp_path)
+  os.symlink(tmp_path / "a", tmp_path / "linked")
+
+  assert [path for path, _ in discover_notes(str(tmp_path))] == ["Top.md", "a/Alpha.md", "a/b/Beta.md"]
+
+
+def test_load_notes_keeps_relative_paths(tmp_path):
+  _write_nested_vault(tmp_path)
+
+  notes = load_notes(str(tmp_path), jobs=2)
+  parsed = parse_notes(str(tmp_path), [], jobs=2)
+
+  assert [(note.path, note.title) for note in notes] == [("Top.md", "Top"), ("a/Alpha.md", "Alpha"),
+                                                         ("a/b/Beta.md", "Beta")]
+  assert _summarise(parsed) == _summarise(notes)
@@ -2,7 +2,7 @@ from unittest.mock import patch, mock_open
 import pytest
 import os.path
 
-from ..backlinker import Note
+from ..backlinker import Note, parse_links
 from .fixtures.notes import example_note_one, example_note_two, example_note_three
 from .fixtures.cats import fixture_cats
 
@@ -86,3 +86,39 @@ def test_note_kittens(fixture_cats):
 
 def test_note_ships_cat(fixture_cats):
   _load_test("Ship\'s Cat", fixture_cats["Ship\'s Cat"])
+
+
+def _parse_titles_by_splitting(content):
+  # the line splitting parse that Note must agree with
+  content_lines = content.strip().split('\n')
+  title = content_lines[0].replace('#', '').strip()
+  content_lines = content_lines[1:]
+
+  other_titles = {}
+  if len(content_lines) > 1 and content_lines[1].startswith('aka'):
+    other_titles = parse_links(content_lines[1])
+    content_lines = content_lines[2:]
+  elif len(content_lines) > 2 and content_lines[2].startswith('aka'):
+    other_titles = parse_links(content_lines[2])
+    content_lines = content_lines[3:]
+
+  return title, other_titles, "\n".join(content_lines).strip()
+
+
+@pytest.mark.parametrize('content', [
+    "",
+    "# Title",
+    "\n\n# Title\n\n",
+    "# Title\n\naka [[Other]]",
+    "# Title\n\naka [[Other]]\n\ncontent",
+    "# Title\ntags\naka [[Other]] [[Another]]\n\n  content  \n\nmore\n",
+    "# Title\ntags\naka [[Other]]",
+    "# Title\n\nno aka here\n\n\n",
+    "# Title\n\n\n\naka [[Too Late]]\ncontent",
+    "# Title\n\t\n content with unicode space \n"
+])
+def test_note_parse_titles(content):
+  note = Note("test.md")
+  note.parse(f"---\nfrontmatter\n---\n{content}")
+
+  assert (note.title, note.other_titles, note.content) == _parse_titles_by_splitting(content)
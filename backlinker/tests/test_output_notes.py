@@ -0,0 +1,69 @@
+import os
+
+from ..backlinker import output_notes
+
+
+def test_output_new_notes(tmp_path):
+
+  summary = output_notes({"One.md": "# One\n", "Two.md": "# Two\n"}, str(tmp_path))
+
+  assert summary == dict(written=0, skipped=0, new=2)
+  assert (tmp_path / "One.md").read_text() == "# One\n"
+
+
+def test_output_skips_unchanged_notes(tmp_path):
+
+  output_notes({"One.md": "# One\n", "Two.md": "# Two\n"}, str(tmp_path))
+  os.utime(tmp_path / "One.md", ns=(0, 0))
+
+  summary = output_notes({"One.md": "# One\n", "Two.md": "# Two, changed\n", "Three.md": "# Three\n"}, str(tmp_path))
+
+  assert summary == dict(written=1, skipped=1, new=1)
+  assert os.stat(tmp_path / "One.md").st_mtime_ns == 0  # not touched
+  assert (tmp_path / "Two.md").read_text() == "# Two, changed\n"
+
+
+def test_output_rewrites_same_size_changes(tmp_path):
+
+  output_notes({"One.md": "# One\n"}, str(tmp_path))
+
+  summary = output_notes({"One.md": "# Uno\n"}, str(tmp_path))
+
+  assert summary == dict(written=1, skipped=0, new=0)
+  assert (tmp_path / "One.md").read_text() == "# Uno\n"
+
+
+def test_output_concurrently_with_fsync(tmp_path):
+
+  rendered_notes = {f"Note {i}.md": f"# Note {i}\n" for i in range(20)}
+  output_notes({"Note 0.md": "# Stale\n"}, str(tmp_path))
+
+  summary = output_notes(rendered_notes, str(tmp_path), jobs=4, fsync=True, batch_size=3)
+
+  assert summary == dict(written=1, skipped=0, new=19)
+  assert sorted(os.listdir(tmp_path)) == sorted(rendered_notes.keys())  # no temporary files left behind
+  for path, rendered in rendered_notes.items():
+    assert (tmp_path / path).read_text() == rendered
+
+
+def test_output_keeps_file_mode(tmp_path):
+
+  output_notes({"One.md": "# One\n"}, str(tmp_path))
+  os.chmod(tmp_path / "One.md", 0o640)
+
+  output_notes({"One.md": "# Uno\n"}, str(tmp_path))
+
+  assert os.stat(tmp_path / "One.md").st_mode & 0o777 == 0o640
+
+
+def test_output_writes_through_linked_notes(tmp_path):
+  os.makedirs(tmp_path / "vault")
+  os.makedirs(tmp_path / "elsewhere")
+  (tmp_path / "elsewhere" / "One.md").write_text("# One\n")
+  os.symlink(os.path.join("..", "elsewhere", "One.md"), tmp_path / "vault" / "One.md")
+
+  summary = output_notes({"One.md": "# Uno\n"}, str(tmp_path / "vault"))
+
+  assert summary == dict(written=1, skipped=0, new=0)
+  assert os.path.islink(tmp_path / "vault" / "One.md")
+  assert (tmp_path / "elsewhere" / "One.md").read_text() == "# Uno\n"
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+
+from ..backlinker import load_notes, load_notes_from_parameters, parse_notes, render_backlinked_notes, run_backlinker
+from ..cache import CACHE_FILE, ParseCache
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _summarise(notes):
+  return list(map(lambda n: (n.path, n.title, n.other_titles, n.frontmatter, n.content, n.find_links()), notes))
+
+
+def _copy_cats(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  return input_dir
+
+
+def test_cached_notes_match_parsed_notes(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  cache_dir = str(tmp_path / 'cache')
+
+  cache = ParseCache.open(cache_dir)
+  first = load_notes(input_dir, cache=cache)
+  cache.save()
+  assert cache.hits == 0
+
+  cache = ParseCache.open(cache_dir)
+  second = load_notes(input_dir, cache=cache)
+  assert cache.hits == 4
+
+  assert _summarise(second) == _summarise(load_notes(input_dir))
+  assert _summarise(second) == _summarise(first)
+
+
+def test_changed_note_is_parsed_again(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  cache_dir = str(tmp_path / 'cache')
+
+  cache = ParseCache.open(cache_dir)
+  load_notes(input_dir, cache=cache)
+  cache.save()
+
+  with open(os.path.join(input_dir, 'Drafts.md'), 'a') as f:
+    f.write("\nA new link to [[Mice]].\n")
+
+  cache = ParseCache.open(cache_dir)
+  notes = load_notes(input_dir, cache=cache)
+
+  assert cache.hits == 3
+  assert "Mice" in notes[1].find_links()
+
+
+def test_touched_note_is_matched_by_digest(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  cache_dir = str(tmp_path / 'cache')
+
+  cache = ParseCache.open(cache_dir)
+  load_notes(input_dir, cache=cache)
+  cache.save()
+
+  path = os.path.join(input_dir, 'Kittens.md')
+  stat = os.stat(path)
+  os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+  cache = ParseCache.open(cache_dir)
+  load_notes(input_dir, cache=cache)
+
+  assert cache.hits == 4
+  assert cache.changed
+
+
+def test_unsupported_version_is_ignored(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  cache_dir = str(tmp_path / 'cache')
+
+  cache = ParseCache.open(cache_dir)
+  load_notes(input_dir, cache=cache)
+  cache.save()
+
+  with open(os.path.join(cache_dir, CACHE_FILE), 'r') as f:
+    contents = json.load(f)
+  contents['version'] = -1
+  with open(os.path.join(cache_dir, CACHE_FILE), 'w') as f:
+    json.dump(contents, f)
+
+  cache = ParseCache.open(cache_dir)
+  load_notes(input_dir, cache=cache)
+
+  assert cache.hits == 0
+
+
+def test_parse_notes_with_cache(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  cache_dir = str(tmp_path / 'cache')
+  exclusions = ["Drafts", "TODO"]
+
+  cache = ParseCache.open(cache_dir)
+  first = parse_notes(input_dir, exclusions, jobs=2, cache=cache)
+  cache.save()
+
+  cache = ParseCache.open(cache_dir)
+  second = parse_notes(input_dir, exclusions, jobs=2, cache=cache)
+
+  assert cache.hits == 4
+  assert _summarise(second) == _summarise(first)
+  assert _summarise(second) == _summarise(parse_notes(input_dir, exclusions, jobs=2))
+
+
+def test_cached_render_keeps_aka_line_without_links(tmp_path):
+  input_dir = _copy_cats(tmp_path)
+  with open(os.path.join(input_dir, 'Dogs.md'), 'w') as f:
+    f.write("---\n---\n\n# Dogs\n\naka nothing else\n\nDogs chase [[Cats]].\n")
+  parameters = {
+      'cache': True,
+      'cache_dir': str(tmp_path / 'cache'),
+      'exclude': [],
+      'input': input_dir,
+      'render_frontmatter': True,
+      'render_index': False,
+      'rewrite_as_links': False
+  }
+
+  uncached = render_backlinked_notes(load_notes(input_dir), parameters)
+  load_notes_from_parameters(parameters)
+  notes_list = load_notes_from_parameters(parameters)
+
+  assert [note.other_titles for note in notes_list if note.title == "Dogs"] == [set()]
+  assert render_backlinked_notes(notes_list, parameters) == uncached
+  assert "\naka\n" in uncached['Dogs.md']
+
+
+def test_unwritable_cache_does_not_stop_the_run(tmp_path, caplog):
+  input_dir = _copy_cats(tmp_path)
+  output_dir = str(tmp_path / 'output')
+  # a cache folder inside a file can never be created
+  blocker = str(tmp_path / 'blocker')
+  open(blocker, 'w').close()
+  parameters = {
+      'cache': True,
+      'cache_dir': os.path.join(blocker, 'cache'),
+      'exclude': [],
+      'input': input_dir,
+      'output': output_dir,
+      'render_frontmatter': True,
+      'render_index': False,
+      'rewrite_as_links': False
+  }
+
+  run_backlinker(parameters)
+
+  assert set(os.listdir(input_dir)) <= set(os.listdir(output_dir))
+  assert "Unable to save parse cache" in caplog.text
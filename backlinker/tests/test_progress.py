@@ -0,0 +1,59 @@
+import io
+import logging
+
+import pytest
+
+from ..progress import Progress, ProgressAwareHandler
+
+
+@pytest.fixture
+def progress_stream(monkeypatch):
+  stream = io.StringIO()
+  monkeypatch.setattr(Progress, 'stream', stream)
+  monkeypatch.setattr(Progress, 'enabled', True)
+  monkeypatch.setattr(Progress, 'interval', 0)
+  return stream
+
+
+def test_progress_disabled_by_default():
+  assert not Progress.enabled
+
+
+def test_progress_line(progress_stream):
+
+  with Progress('Loading', 4) as progress:
+    progress.update()
+    progress.update(3)
+
+    assert progress_stream.getvalue().startswith('\rLoading: 1/4 notes (')
+    assert '\rLoading: 4/4 notes (' in progress_stream.getvalue()
+    assert '\n' not in progress_stream.getvalue()
+
+  # closing erases the line
+  assert progress_stream.getvalue().endswith('\r')
+
+
+def test_progress_rate_limited(progress_stream, monkeypatch):
+  monkeypatch.setattr(Progress, 'interval', 3600)
+
+  with Progress('Loading', 100) as progress:
+    for _ in range(100):
+      progress.update()
+
+  # the first and final updates are drawn
+  assert progress_stream.getvalue().count('notes (') == 2
+
+
+def test_log_records_erase_progress(progress_stream):
+  logger = logging.getLogger('backlinker.tests.progress')
+  handler = ProgressAwareHandler(progress_stream)
+  logger.addHandler(handler)
+
+  try:
+    with Progress('Loading', 2) as progress:
+      progress.update()
+      logger.warning('something happened')
+
+      assert progress_stream.getvalue().endswith('\rsomething happened\n')
+  finally:
+    logger.removeHandler(handler)
@@ -0,0 +1,60 @@
+import glob
+import os
+
+import pytest
+
+from .. import backlinker
+from ..backlinker import BACKLINKER_MARKER, Note, read_note_file, split_note_text
+from ..cache import content_digest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.fixture(params=[False, True], ids=['read', 'mapped'])
+def mapped(request, monkeypatch):
+  if request.param:
+    monkeypatch.setattr(backlinker, 'MMAP_THRESHOLD', 1)
+  return request.param
+
+
+@pytest.mark.parametrize('fixture', ['cats', 'notes'])
+def test_read_note_file_matches_parse(fixture, mapped):
+  for path in glob.glob(os.path.join(FIXTURES, fixture, "*.md")):
+    with open(path, 'r') as f:
+      file_content = f.read()
+
+    size, digest, frontmatter, content = read_note_file(path, with_digest=True)
+
+    assert size == os.path.getsize(path)
+    assert digest == content_digest(file_content)
+    assert (frontmatter, content) == split_note_text(file_content)
+
+
+def test_read_note_file_drops_rendered_backlinks(tmp_path, mapped):
+  path = tmp_path / 'note.md'
+  path.write_text(f"---\ntitle: Note\n---\n\n# Note\n\nbody --- with a rule\n\n{BACKLINKER_MARKER}\n\n---\n\n[[Backlink]]\n")
+
+  _, _, frontmatter, content = read_note_file(path)
+
+  assert frontmatter == "\ntitle: Note\n"
+  assert content == "\n\n# Note\n\nbody --- with a rule\n\n"
+
+
+def test_read_note_file_translates_newlines(tmp_path, mapped):
+  path = tmp_path / 'note.md'
+  path.write_bytes(b"---\r\ntitle: Note\r\n---\r\n\r\n# Note\r\n\r\ncontent\r\n")
+
+  note = Note('note.md')
+  note.load(tmp_path)
+
+  assert note.frontmatter == "title: Note"
+  assert note.title == "Note"
+  assert note.content == "content"
+
+
+def test_read_note_file_without_frontmatter(tmp_path, mapped):
+  path = tmp_path / 'note.md'
+  path.write_text("# Note\n\nno frontmatter here\n")
+
+  with pytest.raises(IndexError):
+    read_note_file(path)
@@ -0,0 +1,68 @@
+from ..backlinker import exclude_notes, render_links_in_content
+
+from .fixtures.notes import example_notes, example_note_one, example_note_two, example_note_three
+from .fixtures.cats import fixture_cats
+
+
+def _render_links_one_at_a_time(links, rewrite_as_links):
+  """
+  The original per-Link substitution, kept as a reference for the single pass rewrite
+  """
+  for link in links:
+    if rewrite_as_links:
+      link.rewrite_in_notes("REDACTED" if link.destination.title == "REDACTED" else None)
+    else:
+      link.update_aliases_in_notes()
+
+
+def _test_matches_per_link_rewrite(notes, links, rewrite_as_links):
+  original_contents = {title: note.content for title, note in notes.items()}
+
+  _render_links_one_at_a_time(links.values(), rewrite_as_links)
+  expected_contents = {title: note.content for title, note in notes.items()}
+
+  for title, note in notes.items():
+    note.content = original_contents[title]
+
+  render_links_in_content(links.values(), rewrite_as_links)
+
+  assert {title: note.content for title, note in notes.items()} == expected_contents
+
+
+def test_soft_links_cats(fixture_cats):
+  _test_matches_per_link_rewrite(fixture_cats['notes'], fixture_cats['links'], False)
+
+  assert "[[Kitten|Kittens]]" in fixture_cats['Cats']['note'].content
+
+
+def test_rewrite_as_links_cats(fixture_cats):
+  _test_matches_per_link_rewrite(fixture_cats['notes'], fixture_cats['links'], True)
+
+  assert "[Kitten](Kittens.md)" in fixture_cats['Cats']['note'].content
+  assert "[[" not in fixture_cats['Cats']['note'].content
+
+
+def test_soft_links_notes(example_notes):
+  _test_matches_per_link_rewrite(example_notes['notes'], example_notes['links'], False)
+
+
+def test_rewrite_as_links_notes(example_notes):
+  _test_matches_per_link_rewrite(example_notes['notes'], example_notes['links'], True)
+
+
+def test_rewrite_as_links_redacted(example_notes):
+  notes, links = exclude_notes(example_notes['notes'], example_notes['links'], {"Note 2"})
+
+  _test_matches_per_link_rewrite(notes, links, True)
+
+  assert "[REDACTED](REDACTED.md)" in notes['Note 3'].content
+
+
+def test_unknown_titles_untouched(fixture_cats):
+  kittens = fixture_cats['Kittens']['note']
+  links = {"Animals": fixture_cats['links']['Animals']}
+
+  render_links_in_content(links.values(), True)
+
+  assert "[Animals](Animals.md)" in kittens.content
+  assert "[[Cat]]" in kittens.content
@@ -0,0 +1,93 @@
+import os
+import shutil
+
+import pytest
+
+from ..backlinker import discover_notes, run_backlinker
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _parameters(output_dir, **overrides):
+  parameters = {
+      'exclude': ["Drafts"],
+      'input': os.path.join(fixtures_dir, 'cats'),
+      'output': output_dir,
+      'render_frontmatter': True,
+      'render_index': True,
+      'rewrite_as_links': False
+  }
+  parameters.update(overrides)
+  return parameters
+
+
+def test_run_backlinker_returns_stats(tmp_path):
+
+  stats = run_backlinker(_parameters(str(tmp_path)))
+
+  assert list(stats['stages'].keys()) == ['load', 'exclude_sections', 'backlink',
+                                          'exclude_notes', 'rewrite_links', 'create_index', 'render', 'output']
+  for timing in stats['stages'].values():
+    assert timing['wall'] >= 0 and timing['cpu'] >= 0
+
+  counters = stats['counters']
+  assert counters['files_read'] == 4
+  assert counters['bytes_read'] == sum(os.path.getsize(os.path.join(fixtures_dir, 'cats', name))
+                                       for name in os.listdir(os.path.join(fixtures_dir, 'cats')))
+  assert counters['notes'] == 4
+  assert counters['aliases'] == 3
+  assert counters['sections_excluded'] == 1
+  assert counters['redactions'] == 0
+  assert counters['files_written'] == len(os.listdir(tmp_path))
+  assert counters['bytes_written'] == sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+
+
+def test_run_backlinker_counts_only_changed_writes(tmp_path):
+
+  run_backlinker(_parameters(str(tmp_path)))
+  stats = run_backlinker(_parameters(str(tmp_path)))
+
+  assert stats['counters']['files_written'] == 0
+  assert 'bytes_written' not in stats['counters']
+
+
+def test_run_backlinker_links_notes_in_folders(tmp_path):
+  input_dir = tmp_path / "input"
+  notes = {
+      "Top.md": "# Top\n\nSee [[Beta]]",
+      "a/Alpha.md": "# Alpha\n\nSee [[Top]] and [[Beta]]",
+      "a/b/Beta.md": "# Beta\n\nSee [[Alpha]]"
+  }
+  for path, content in notes.items():
+    (input_dir / path).parent.mkdir(parents=True, exist_ok=True)
+    (input_dir / path).write_text(f"---\n---\n{content}")
+  output_dir = tmp_path / "output"
+  output_dir.mkdir()
+
+  run_backlinker(_parameters(str(output_dir), input=str(input_dir), exclude=[], rewrite_as_links=True, fsync=True))
+
+  assert sorted(os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/')
+                for root, _, names in os.walk(output_dir) for name in names) == ["Index.md", "Top.md", "a/Alpha.md",
+                                                                                  "a/b/Beta.md"]
+  alpha = (output_dir / "a" / "Alpha.md").read_text()
+  assert "See [Top](../Top.md) and [Beta](b/Beta.md)" in alpha
+  assert "- [Beta](b/Beta.md)" in alpha
+  assert "[Alpha](../Alpha.md)" in (output_dir / "a" / "b" / "Beta.md").read_text()
+  assert "[Beta](a/b/Beta.md)" in (output_dir / "Index.md").read_text()
+
+
+@pytest.mark.parametrize('overrides', [dict(), dict(jobs=2, processes=True), dict(cache=True)])
+def test_run_backlinker_skips_output_inside_input(tmp_path, overrides):
+  input_dir = tmp_path / "vault"
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  output_dir = input_dir / "public"
+  output_dir.mkdir()
+  parameters = _parameters(str(output_dir), input=str(input_dir), **overrides)
+
+  run_backlinker(parameters)
+  stats = run_backlinker(parameters)
+
+  assert stats['counters']['notes'] == 4
+  assert stats['counters']['files_written'] == 0
+  assert [path for path, _ in discover_notes(str(input_dir), output_dir=str(output_dir))] == [
+      "Cats.md", "Drafts.md", "Kittens.md", "Ship's Cat.md"]
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import socket
+import threading
+
+import pytest
+
+from .. import serve
+from ..backlinker import load_notes, render_backlinked_notes
+from ..serve import BacklinkServer, BacklinkService, _refresh_until_stopped, _remove_stale_socket
+from ..watch import LiveGraph
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+parameters = {
+    'exclude': [],
+    'render_frontmatter': True,
+    'render_index': False,
+    'rewrite_as_links': True
+}
+
+
+@pytest.fixture
+def service(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  return BacklinkService(LiveGraph(load_notes(input_dir)), dict(parameters, input=input_dir))
+
+
+def _result(service, **request):
+  response = service.handle(request)
+  assert response['ok'], response
+  return response['result']
+
+
+def test_backlinks_through_other_titles(service):
+  result = _result(service, op='backlinks', title='Kitten')
+
+  assert result['title'] == 'Kittens'
+  assert result['backlinks'] == [dict(title='Cats', path='Cats.md', via='Kittens'),
+                                 dict(title='Cats', path='Cats.md', via='Kitten')]
+
+
+def test_backlinks_to_title_without_note(service):
+  result = _result(service, op='backlinks', title='Mice')
+
+  assert result['path'] is None
+  assert [backlink['title'] for backlink in result['backlinks']] == ['Cats']
+
+
+def test_outgoing_and_resolve(service):
+  outgoing = _result(service, op='outgoing', title='Cats')['outgoing']
+
+  assert dict(title='Kitten', destination='Kittens', path='Kittens.md') in outgoing
+  assert dict(title='Dogs', destination='Dogs', path=None) in outgoing
+  assert _result(service, op='resolve', title='Kitten') == dict(title='Kitten', note='Kittens', path='Kittens.md')
+
+
+def test_render_matches_full_render(service):
+  expected = render_backlinked_notes(load_notes(service.input_dir), dict(parameters))
+
+  assert _result(service, op='render', title='Cats')['rendered'] == expected['Cats.md']
+
+
+def test_errors_are_answered(service):
+  assert service.handle(dict(op='resolve', title='Dogs')) == dict(ok=False, error="no note titled 'Dogs'")
+  assert service.handle(dict(op='render')) == dict(ok=False, error="request has no title")
+  assert service.handle(dict(op='delete', title='Cats')) == dict(ok=False, error="unknown op: delete")
+  assert json.loads(service.handle_line(b"{not json"))['ok'] is False
+
+  metrics = _result(service, op='metrics')['requests']
+  assert metrics['invalid']['errors'] == 2
+  assert metrics['resolve']['count'] == 1 and metrics['resolve']['errors'] == 1
+
+
+def test_refresh_picks_up_new_notes(service):
+  with open(os.path.join(service.input_dir, 'Dogs.md'), 'w') as f:
+    f.write("---\n---\n\n# Dogs\n\nDogs chase [[Cats]].\n")
+
+  service.refresh({'Dogs.md'})
+
+  assert _result(service, op='resolve', title='Dogs')['path'] == 'Dogs.md'
+  assert dict(title='Dogs', path='Dogs.md', via='Cats') in _result(service, op='backlinks', title='Cats')['backlinks']
+
+
+def test_serves_requests_over_socket(service, tmp_path):
+  socket_path = str(tmp_path / 'backlinker.sock')
+  server = BacklinkServer(socket_path, service)
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+
+  try:
+    assert os.stat(socket_path).st_mode & 0o777 == 0o600
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+      client.connect(socket_path)
+      stream = client.makefile('rwb')
+      responses = []
+      for title in ['Kitten', 'Cat']:
+        stream.write(json.dumps(dict(op='resolve', title=title)).encode('utf-8') + b"\n")
+        stream.flush()
+        responses.append(json.loads(stream.readline()))
+
+    assert [response['result']['note'] for response in responses] == ['Kittens', 'Cats']
+
+    with pytest.raises(ValueError):
+      _remove_stale_socket(socket_path)
+  finally:
+    server.shutdown()
+    server.server_close()
+
+  _remove_stale_socket(socket_path)
+  assert not os.path.exists(socket_path)
+
+
+def test_malformed_requests_are_answered(service, monkeypatch):
+  assert service.handle(dict(op=["backlinks"], title='Cats')) == dict(ok=False, error="unknown op: ['backlinks']")
+  assert service.handle(["backlinks"]) == dict(ok=False, error="unknown op: None")
+
+  def fail(request):
+    raise KeyError('broken')
+
+  monkeypatch.setitem(service.operations, 'outgoing', fail)
+  assert service.handle(dict(op='outgoing', title='Cats')) == dict(ok=False, error="internal error: 'broken'")
+
+  metrics = service.metrics.as_dict()
+  assert metrics['invalid']['errors'] == 2
+  assert metrics['outgoing']['errors'] == 1
+
+
+def test_refresh_survives_failures(service, monkeypatch):
+  stopped = threading.Event()
+  batches = [{'Cats.md'}, {'Dogs.md'}]
+
+  class Watcher(object):
+
+    def wait(self):
+      names = batches.pop(0)
+      if len(batches) == 0:
+        stopped.set()
+      return names
+
+  refreshed = []
+
+  def refresh(names):
+    if 'Cats.md' in names:
+      raise OSError('gone')
+    refreshed.append(names)
+    return set()
+
+  monkeypatch.setattr(service, 'refresh', refresh)
+  _refresh_until_stopped(service, Watcher(), stopped)
+
+  assert refreshed == [{'Dogs.md'}]
+
+
+def test_failed_refresh_reloads_the_vault(service, monkeypatch):
+  def fail(graph, input_dir, names, exclusions):
+    graph.remove('Cats.md')
+    raise KeyError('broken')
+
+  monkeypatch.setattr(serve, 'apply_changes', fail)
+  with pytest.raises(KeyError):
+    service.refresh({'Cats.md'})
+
+  assert _result(service, op='resolve', title='Cats')['path'] == 'Cats.md'
@@ -0,0 +1,111 @@
+import os
+import shutil
+
+import pytest
+
+from ..backlinker import load_notes, run_backlinker
+from ..store import Backlink, GraphStore, StoredNote, run_query
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.fixture
+def vault(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  return input_dir
+
+
+@pytest.fixture
+def store(tmp_path, vault):
+  with GraphStore.open(str(tmp_path / 'store' / 'graph.db')) as store:
+    store.update(vault)
+    yield store
+
+
+def test_store_holds_the_graph(store, vault):
+  notes = load_notes(vault)
+
+  assert len(store) == len(notes)
+  for note in notes:
+    assert store.resolve(note.title) == StoredNote(note.title, note.path)
+    assert store.other_titles(note.title) == sorted(note.other_titles)
+
+
+def test_backlinks_through_other_titles(store):
+  assert store.backlinks("Kitten") == [Backlink("Cats", "Cats.md", "Kitten"), Backlink("Cats", "Cats.md", "Kittens")]
+  assert store.backlinks("Mice") == [Backlink("Cats", "Cats.md", "Mice")]
+
+
+def test_dangling_and_orphans(store, vault):
+  assert ("Dogs", ["Cats.md"]) in store.dangling()
+  assert "Kittens" not in [title for title, _ in store.dangling()]
+  assert store.orphans() == []
+
+  with open(os.path.join(vault, "Hermit Crab.md"), 'w') as f:
+    f.write("---\n---\n# Hermit Crab\n\naka [[Crab]]\n\nLives alone.\n")
+  store.update(vault)
+
+  assert store.orphans() == [StoredNote("Hermit Crab", "Hermit Crab.md")]
+
+
+def test_update_only_reads_changed_notes(store, vault):
+  assert store.update(vault) == dict(added=0, updated=0, removed=0, unchanged=4)
+
+  kittens_path = os.path.join(vault, "Kittens.md")
+  contents = open(kittens_path).read().replace("A kitten is a baby [[Cat]].", "A kitten chases [[Mice]].")
+  with open(kittens_path, 'w') as f:
+    f.write(contents)
+  os.remove(os.path.join(vault, "Drafts.md"))
+
+  assert store.update(vault) == dict(added=0, updated=1, removed=1, unchanged=2)
+  assert store.resolve("Drafts") is None
+  assert Backlink("Kittens", "Kittens.md", "Mice") in store.backlinks("Mice")
+
+
+def test_update_with_other_exclusions_rebuilds(store, vault):
+  counts = store.update(vault, exclusions=["Drafts"])
+
+  assert counts == dict(added=4, updated=0, removed=0, unchanged=0)
+  assert store.backlinks("Mice") == []  # only linked from the excluded Drafts section
+
+
+def test_query_without_exclude_keeps_stored_exclusions(store, vault, capsys):
+  store.update(vault, exclusions=["Drafts"])
+
+  assert run_query(dict(store=store.path, input=vault, query='backlinks', title='Mice'))
+  assert capsys.readouterr().out == ""
+  assert store.exclusions() == ["Drafts"]
+  assert store.update(vault) == dict(added=0, updated=0, removed=0, unchanged=4)
+
+
+def test_run_backlinker_stores_loaded_notes(tmp_path, vault, capsys):
+  store_path = str(tmp_path / 'graph.db')
+  parameters = {
+      'exclude': [],
+      'input': vault,
+      'output': str(tmp_path),
+      'render_frontmatter': True,
+      'render_index': False,
+      'rewrite_as_links': True,
+      'store': store_path
+  }
+
+  stats = run_backlinker(parameters)
+
+  # stored from the notes as loaded, not as rewritten for output
+  assert 'store' in stats['stages']
+  assert stats['counters']['files_read'] == 4
+
+  assert run_query(dict(store=store_path, query='alias', title='Felis catus'))
+  assert capsys.readouterr().out == "Felis catus -> Cats (Cats.md)\naka Cat, Felis catus\n"
+  assert not run_query(dict(store=store_path, query='alias', title='Dogs'))
+
+
+def test_query_without_store_fails(tmp_path):
+  store_path = str(tmp_path / 'typo' / 'graph.db')
+
+  with pytest.raises(ValueError):
+    run_query(dict(store=store_path, query='orphans'))
+
+  assert not os.path.exists(tmp_path / 'typo')
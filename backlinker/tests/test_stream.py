@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import pytest
+
+from ..backlinker import run_backlinker
+from ..stream import run_streaming, scan_links
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _parameters(fixture, output_dir, **overrides):
+  parameters = {
+      'exclude': [],
+      'input': os.path.join(fixtures_dir, fixture),
+      'output': output_dir,
+      'render_frontmatter': True,
+      'render_index': False,
+      'rewrite_as_links': False
+  }
+  parameters.update(overrides)
+  return parameters
+
+
+def _read_tree(directory):
+  contents = dict()
+  for root, _, names in os.walk(directory):
+    for name in names:
+      with open(os.path.join(root, name)) as f:
+        contents[os.path.relpath(os.path.join(root, name), directory)] = f.read()
+
+  return contents
+
+
+@pytest.mark.parametrize('fixture', ['cats', 'notes'])
+@pytest.mark.parametrize('overrides', [
+    dict(),
+    dict(rewrite_as_links=True, render_index=True),
+    dict(exclude=["Drafts", "Secret"], rewrite_as_links=True),
+    dict(exclude=["Other Tag"], render_frontmatter=False, render_index=True, shard_index=True, jobs=3)
+])
+def test_streaming_writes_the_same_notes(tmp_path, fixture, overrides):
+  (tmp_path / 'run').mkdir()
+  (tmp_path / 'stream').mkdir()
+
+  run_backlinker(_parameters(fixture, str(tmp_path / 'run'), **overrides))
+  stats = run_streaming(_parameters(fixture, str(tmp_path / 'stream'), **overrides))
+
+  assert _read_tree(tmp_path / 'stream') == _read_tree(tmp_path / 'run')
+  # excluded notes are not read a second time
+  assert stats['counters']['files_read'] <= 2 * stats['counters']['notes']
+
+
+def test_scan_keeps_only_titles_and_links():
+  scanned = scan_links(os.path.join(fixtures_dir, 'cats'), ["Drafts"])
+
+  assert [note.path for note in scanned] == ["Cats.md", "Drafts.md", "Kittens.md", "Ship's Cat.md"]
+  assert all(note.content == '' and note.frontmatter is None for note in scanned)
+  assert "Kittens" in scanned[0].find_links()
+  assert "Mice" not in scanned[0].find_links()  # only linked from the excluded Drafts section
+
+
+def test_streaming_skips_output_inside_input(tmp_path):
+  input_dir = tmp_path / 'vault'
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  (input_dir / 'public').mkdir()
+  parameters = _parameters('cats', str(input_dir / 'public'), input=str(input_dir))
+
+  run_streaming(parameters)
+  stats = run_streaming(parameters)
+
+  assert stats['counters']['notes'] == 4
+  assert stats['counters']['files_written'] == 0
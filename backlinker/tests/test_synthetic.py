@@ -0,0 +1,28 @@
+import os
+
+from ..backlinker import backlink, load_notes, parse_sections
+from ..synthetic import SECTION_LABEL, generate_vault
+
+
+def test_generate_vault(tmp_path):
+
+  paths = generate_vault(str(tmp_path), notes=200, alias_ratio=0.5, section_frequency=0.5, private_ratio=0.1)
+
+  assert len(paths) == 200
+  assert sorted(os.listdir(tmp_path)) == sorted(paths)
+
+  notes_list = load_notes(str(tmp_path))
+  notes, links = backlink(notes_list)
+
+  assert sum(1 for note in notes_list if len(note.other_titles) > 0) > 50
+  assert sum(1 for note in notes_list if len(parse_sections(note.content, SECTION_LABEL)) > 0) > 50
+  assert len(links[SECTION_LABEL].sources) > 5
+
+
+def test_generate_vault_is_deterministic(tmp_path):
+
+  generate_vault(str(tmp_path / 'a'), notes=20, seed=3)
+  generate_vault(str(tmp_path / 'b'), notes=20, seed=3)
+
+  for name in os.listdir(tmp_path / 'a'):
+    assert (tmp_path / 'a' / name).read_text() == (tmp_path / 'b' / name).read_text()
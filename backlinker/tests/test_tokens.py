@@ -0,0 +1,80 @@
+from ..backlinker import Note, Tokens, Wikilink, parse_sections
+from .fixtures.cats import fixture_cats
+
+text = """
+# Testing Tokens
+
+A link to [[Cats]] and one to [[Kitten|a kitten]].
+
+<!-- SECTION -->
+section content with a [[Dogs]] link
+<!-- End SECTION -->
+
+<!-- End SECTION -->
+out of order
+<!-- SECTION -->
+
+<!-- DIFFERENT SECTION -->
+this should not match
+<!-- End DIFFERENT SECTION -->
+
+<!-- a comment that <!-- SECTION -->
+second section
+<!-- End SECTION -->
+
+Opening section line should not match
+<!-- SECTION -->
+"""
+
+
+def test_tokens_links():
+  tokens = Tokens(text)
+
+  assert list(map(lambda link: (link.title, link.alias), tokens.links)) == [
+      ("Cats", None),
+      ("Kitten", "a kitten"),
+      ("Dogs", None)
+  ]
+  for link in tokens.links:
+    assert text[link.start:link.end].startswith(f"[[{link.title}")
+
+
+def test_tokens_section_spans_match_parse_sections(fixture_cats):
+  for label in ["SECTION", "DIFFERENT SECTION", "End SECTION", "Missing"]:
+    spans = [(span.start, span.end) for span in Tokens(text).section_spans([label])]
+    assert spans == [(section['start'], section['end']) for section in parse_sections(text, label)]
+
+  for note in fixture_cats['notes'].values():
+    for label in ["Drafts", "TODO"]:
+      spans = [(span.start, span.end) for span in note.tokens.section_spans([label])]
+      assert spans == [(section['start'], section['end']) for section in parse_sections(note.content, label)]
+
+
+def test_tokens_plain_text():
+  tokens = Tokens("No links or comments here, just [single] brackets.")
+
+  assert tokens.links == []
+  assert tokens.markers == []
+
+
+def test_tokens_rewrite(fixture_cats):
+  links = fixture_cats['links']
+
+  rewritten, count = Tokens(text).rewrite({"Kitten": links["Kitten"], "Dogs": links["Dogs"]}, True)
+
+  assert count == 2
+  assert "[[Cats]]" in rewritten
+  assert "[Kitten](Kittens.md)" in rewritten
+  assert "[Dogs](Dogs.md)" in rewritten
+
+
+def test_note_tokens_follow_content():
+  note = Note("test.md")
+  note.content = "A link to [[Cats]]"
+
+  assert note.find_links() == {"Cats"}
+
+  note.content = "A link to [[Dogs]]"
+
+  assert note.tokens.links == [Wikilink(10, 18, "Dogs", None)]
+  assert note.find_links() == {"Dogs"}
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from ..backlinker import load_notes_from_parameters, render_backlinked_notes
+from ..vault import Vault
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+options = [
+    dict(),
+    dict(rewrite_as_links=True),
+    dict(render_frontmatter=False, render_index=True),
+    dict(rewrite_as_links=True, render_index=True, shard_index=True),
+    dict(exclude=["Drafts"]),
+    dict(exclude=["Secret"], rewrite_as_links=True, render_index=True),
+    dict(exclude=["Drafts"], exclude_depth=None)
+]
+
+
+def _parameters(fixture, exclude=(), exclude_depth=1, rewrite_as_links=False, render_frontmatter=True,
+                render_index=False, shard_index=False):
+  return {
+      'exclude': list(exclude),
+      'exclude_depth': exclude_depth,
+      'input': os.path.join(fixtures_dir, fixture),
+      'render_frontmatter': render_frontmatter,
+      'render_index': render_index,
+      'rewrite_as_links': rewrite_as_links,
+      'shard_index': shard_index
+  }
+
+
+@pytest.mark.parametrize('fixture', ['cats', 'notes'])
+def test_vault_renders_as_a_run_would(fixture):
+  vault = Vault.load(os.path.join(fixtures_dir, fixture))
+
+  # one vault rendered with every set of options in turn
+  for option in options:
+    parameters = _parameters(fixture, **option)
+    parameters['exclude'] = []
+    expected = render_backlinked_notes(load_notes_from_parameters(parameters), _parameters(fixture, **option))
+
+    assert vault.render(**option) == expected
+
+
+def test_vault_leaves_notes_untouched():
+  vault = Vault.load(os.path.join(fixtures_dir, 'cats'))
+  contents = [(note.path, note.content) for note in vault.notes_list]
+
+  vault.render(exclude=["Drafts"], rewrite_as_links=True, render_index=True)
+
+  assert [(note.path, note.content) for note in vault.notes_list] == contents
+  assert "Index" not in vault.graph.notes
+  assert "REDACTED" not in vault.graph.notes
+
+
+def test_vault_stages():
+  vault = Vault.load(os.path.join(fixtures_dir, 'cats'), exclude_sections=["Drafts"])
+
+  graph = vault.backlink()
+  assert graph is vault.backlink()
+  assert "Mice" not in graph.links  # only linked from the excluded Drafts section
+
+  excluded = vault.exclude_notes(["Drafts"])
+  assert "Drafts" not in excluded.notes
+  assert excluded.exclusion_report.excluded == ["Drafts"]
+
+  indexed = vault.create_index_note(graph=excluded)
+  assert "Index" in indexed.notes and "Index" not in excluded.notes
+
+  rendered = vault.render_notes(graph=indexed)
+  assert set(rendered.keys()) == {note.path for note in indexed.notes.values()}
@@ -0,0 +1,208 @@
+import os
+import shutil
+
+import pytest
+
+from ..backlinker import load_notes, render_backlinked_notes
+from ..watch import InotifyWatcher, LiveGraph, PollingWatcher, apply_changes, inotify_simple
+
+fixtures_dir = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+parameters = {
+    'exclude': [],
+    'render_frontmatter': True,
+    'render_index': False,
+    'rewrite_as_links': False
+}
+
+requires_inotify = pytest.mark.skipif(inotify_simple is None, reason='inotify_simple is not installed')
+
+new_dogs = """---
+title: Dogs
+---
+
+# Dogs
+
+aka [[Puppy]]
+tags [[Animals]]
+
+Dogs do not like [[Cat|cats]].
+"""
+
+
+def _write(input_dir, name, contents):
+  with open(os.path.join(input_dir, name), 'w') as f:
+    f.write(contents)
+
+
+def _rename_drafts(input_dir):
+  contents = open(os.path.join(input_dir, "Drafts.md")).read()
+  os.remove(os.path.join(input_dir, "Drafts.md"))
+  _write(input_dir, "Draft Pages.md", contents.replace("# Drafts", "# Draft Pages"))
+
+
+def _render(graph, notes, rewrite_as_links):
+  return {note.path: graph.render(note, rewrite_as_links, True) for note in notes if graph.is_current(note)}
+
+
+@pytest.mark.parametrize('rewrite_as_links', [False, True])
+def test_incremental_updates_match_full_render(tmp_path, rewrite_as_links):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  graph = LiveGraph(load_notes(input_dir))
+  full_parameters = dict(parameters, rewrite_as_links=rewrite_as_links)
+
+  edits = [
+      lambda: _write(input_dir, "Kittens.md", open(os.path.join(input_dir, "Kittens.md")).read().replace(
+          "A kitten is a baby [[Cat]].", "A kitten is a baby [[Cat]] that chases [[Mice]] and [[Dogs]].")),
+      lambda: _write(input_dir, "Dogs.md", new_dogs),
+      lambda: _rename_drafts(input_dir),
+      lambda: _write(input_dir, "Puppies.md", "---\n---\n\n# Puppies\n\nSee [[Puppy]] and [[Ship's Cat]].\n"),
+      lambda: os.remove(os.path.join(input_dir, "Cats.md")),
+  ]
+
+  for edit in edits:
+    before = _render(graph, graph.notes.values(), rewrite_as_links)
+
+    watcher = PollingWatcher(input_dir, 0.001)
+    edit()
+    names = watcher.wait()
+
+    affected = apply_changes(graph, input_dir, names, [])
+    after = _render(graph, graph.notes.values(), rewrite_as_links)
+
+    assert after == render_backlinked_notes(load_notes(input_dir), full_parameters)
+
+    # every note whose rendering changed was reported as affected
+    changed = set(path for path, rendered in after.items() if before.get(path, None) != rendered)
+    assert changed <= set(note.path for note in affected)
+
+
+def test_duplicate_title_is_ignored(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  graph = LiveGraph(load_notes(input_dir))
+
+  _write(input_dir, "Other Cats.md", "---\n---\n\n# Cats\n\nMore cats.\n")
+  affected = apply_changes(graph, input_dir, {"Other Cats.md"}, [])
+
+  assert affected == set()
+  assert graph.notes["Cats"].path == "Cats.md"
+  assert "Other Cats.md" not in graph.by_path
+
+
+def test_unchanged_note_is_not_reloaded(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  graph = LiveGraph(load_notes(input_dir))
+
+  os.utime(os.path.join(input_dir, "Cats.md"), ns=(0, 0))
+
+  assert apply_changes(graph, input_dir, {"Cats.md"}, []) == set()
+
+
+def test_undecodable_note_is_ignored(tmp_path, caplog):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  graph = LiveGraph(load_notes(input_dir))
+
+  with open(os.path.join(input_dir, "Dogs.md"), 'wb') as f:
+    f.write(b"---\n---\n\n# Dogs\n\nCaf\xc3")
+
+  assert apply_changes(graph, input_dir, {"Dogs.md"}, []) == set()
+  assert "Dogs.md" not in graph.by_path
+  assert "Unable to load Dogs.md" in caplog.text
+
+
+@pytest.mark.parametrize('edit', ['change', 'remove'])
+def test_note_linking_to_itself(tmp_path, edit):
+  input_dir = str(tmp_path / 'vault')
+  os.makedirs(input_dir)
+  _write(input_dir, "a.md", "---\n---\n\n# A\n\naka [[Ay]]\n\nSee [[A]] and [[Ay]].\n")
+
+  graph = LiveGraph(load_notes(input_dir))
+
+  if edit == 'change':
+    _write(input_dir, "a.md", "---\n---\n\n# A\n\naka [[Ay]]\n\nSee [[A]] again.\n")
+  else:
+    os.remove(os.path.join(input_dir, "a.md"))
+  apply_changes(graph, input_dir, {"a.md"}, [])
+
+  after = _render(graph, graph.notes.values(), False)
+  assert after == render_backlinked_notes(load_notes(input_dir), parameters)
+
+
+def test_moved_note_is_removed_before_it_is_added(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  os.makedirs(os.path.join(input_dir, 'Animals'))
+
+  graph = LiveGraph(load_notes(input_dir))
+
+  watcher = PollingWatcher(input_dir, 0.001)
+  os.rename(os.path.join(input_dir, "Kittens.md"), os.path.join(input_dir, "Animals", "Kittens.md"))
+  apply_changes(graph, input_dir, watcher.wait(), [])
+
+  assert graph.notes["Kittens"].path == "Animals/Kittens.md"
+  assert _render(graph, graph.notes.values(), False) == render_backlinked_notes(load_notes(input_dir), parameters)
+
+
+def _collect(watcher, reads=5):
+  # a save may be reported over several reads
+  names = set()
+  for _ in range(reads):
+    names.update(watcher.wait())
+  return names
+
+
+@requires_inotify
+def test_inotify_reports_edits_and_new_notes(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+
+  watcher = InotifyWatcher(input_dir, 0.05)
+  _write(input_dir, "Cats.md", open(os.path.join(input_dir, "Cats.md")).read() + "\nMore about [[Dogs]].\n")
+  _write(input_dir, "Dogs.md", new_dogs)
+  _write(input_dir, "notes.txt", "not a note")
+
+  assert _collect(watcher) == {"Cats.md", "Dogs.md"}
+
+
+@requires_inotify
+def test_inotify_reports_folder_moves(tmp_path):
+  input_dir = str(tmp_path / 'cats')
+  shutil.copytree(os.path.join(fixtures_dir, 'cats'), input_dir)
+  outside_dir = str(tmp_path / 'outside')
+  os.makedirs(os.path.join(outside_dir, 'Dogs', 'Puppies'))
+  _write(os.path.join(outside_dir, 'Dogs'), "Dogs.md", new_dogs)
+  _write(os.path.join(outside_dir, 'Dogs', 'Puppies'), "Puppies.md", "---\n---\n\n# Puppies\n\nYoung [[Dogs]].\n")
+
+  graph = LiveGraph(load_notes(input_dir))
+  watcher = InotifyWatcher(input_dir, 0.05)
+
+  os.rename(os.path.join(outside_dir, 'Dogs'), os.path.join(input_dir, 'Dogs'))
+  names = _collect(watcher)
+  assert names == {"Dogs/Dogs.md", "Dogs/Puppies/Puppies.md"}
+
+  apply_changes(graph, input_dir, names, [])
+  assert _render(graph, graph.notes.values(), False) == render_backlinked_notes(load_notes(input_dir), parameters)
+
+  # notes in a folder moved in are watched like any other
+  _write(os.path.join(input_dir, 'Dogs', 'Puppies'), "Puppies.md", "---\n---\n\n# Puppies\n\nYoung dogs.\n")
+  assert _collect(watcher) == {"Dogs/Puppies/Puppies.md"}
+
+  os.rename(os.path.join(input_dir, 'Dogs'), os.path.join(outside_dir, 'Dogs'))
+  names = _collect(watcher)
+  assert names == {"Dogs/"}
+
+  apply_changes(graph, input_dir, names, [])
+  assert "Dogs/Dogs.md" not in graph.by_path
+  assert _render(graph, graph.notes.values(), False) == render_backlinked_notes(load_notes(input_dir), parameters)
+
+  # nor is the folder watched once moved out
+  _write(os.path.join(outside_dir, 'Dogs'), "Dogs.md", new_dogs + "\nMore.\n")
+  assert _collect(watcher) == set()
@@ -0,0 +1,129 @@
+"""
+In-process API: a vault is loaded once and kept in memory, and can then be backlinked, excluded from and rendered any
+number of times without going back to disk
+"""
+
+import copy
+import logging
+
+from .backlinker import (Graph, backlink, create_index_notes, exclude_notes, load_notes_from_parameters, render_notes)
+from .progress import Progress
+from .stats import NullStats
+
+logger = logging.getLogger(__name__)
+
+
+class Vault(object):
+  """
+  The notes of a vault along with their link graph, which is built on first use. Every stage returns a new `Graph`
+  and leaves the loaded notes untouched, so one vault can be rendered with different options in turn
+  """
+
+  def __init__(self, notes_list):
+    self.notes_list = notes_list
+    self._graph = None
+
+  @classmethod
+  def load(cls, input_dir, exclude_sections=(), jobs=1, processes=False, cache=False, cache_dir=None, stats=None):
+    """
+    Loads the notes in `input_dir` with any `exclude_sections` removed, as `run_backlinker` would
+    """
+    parameters = {
+        'cache': cache,
+        'cache_dir': cache_dir,
+        'exclude': list(exclude_sections),
+        'input': input_dir,
+        'jobs': jobs,
+        'processes': processes
+    }
+    return cls(load_notes_from_parameters(parameters, stats))
+
+  def __len__(self):
+    return len(self.notes_list)
+
+  @property
+  def graph(self):
+    return self.backlink()
+
+  def backlink(self):
+    """
+    Returns the `Graph` of the loaded notes
+    """
+    if self._graph is None:
+      self._graph = backlink(self.notes_list)
+
+    return self._graph
+
+  def exclude_notes(self, titles, depth=1, graph=None):
+    """
+    Returns `graph`, by default the backlinked vault, without the notes titled or tagged with `titles` and the notes
+    linking to them within `depth` links, see `exclude_notes`
+    """
+    if graph is None:
+      graph = self.backlink()
+
+    return exclude_notes(graph.notes, graph.links, titles, graph.index, depth)
+
+  def create_index_note(self, rewrite_as_links=False, shard=False, graph=None):
+    """
+    Returns `graph`, by default the backlinked vault, with the `Index` note and any `shard` notes added
+    """
+    if graph is None:
+      graph = self.backlink()
+
+    notes = dict(graph.notes)
+    create_index_notes(notes, rewrite_as_links, shard)
+
+    return Graph(notes, graph.links, graph.aliases, graph.index, graph.exclusion_report)
+
+  def render_notes(self, rewrite_as_links=False, render_frontmatter=True, graph=None):
+    """
+    Renders every note of `graph`, by default the backlinked vault, returning the rendered notes keyed by path.
+    Links are rewritten in copies of the notes linking from
+    """
+    if graph is None:
+      graph = self.backlink()
+
+    links_by_source = dict()
+    for link in graph.links.values():
+      for source in link.sources:
+        links_by_source.setdefault(source, dict())[link.title] = link
+
+    views = dict()
+    with Progress('Rewriting links', len(links_by_source)) as progress:
+      for title, note in graph.notes.items():
+        if note in links_by_source:
+          view = copy.copy(note)
+          view.content = note.tokens.rewrite(links_by_source[note], rewrite_as_links, note.path)[0]
+          views[title] = view
+          progress.update()
+        else:
+          views[title] = note
+
+    return render_notes(views, graph.links, rewrite_as_links, render_frontmatter, graph.aliases)
+
+  def render(self, exclude=(), exclude_depth=1, rewrite_as_links=False, render_frontmatter=True, render_index=False,
+             shard_index=False, stats=None):
+    """
+    Runs every stage on the vault with these options, returning the rendered notes keyed by path as
+    `render_backlinked_notes` would. `exclude` only excludes notes, sections are excluded when loading
+    """
+    stats = stats or NullStats()
+
+    with stats.stage('backlink'):
+      graph = backlinked = self.backlink()
+    stats.set('links', len(graph.links))
+
+    if len(exclude) > 0:
+      with stats.stage('exclude_notes'):
+        graph = self.exclude_notes(exclude, exclude_depth, graph)
+      logger.info('Excluded %d notes (%d links)', len(backlinked.notes) - len(graph.notes),
+                  len(backlinked.links) - len(graph.links))
+      stats.set('redactions', len(graph.exclusion_report.redacted))
+
+    if render_index:
+      with stats.stage('create_index'):
+        graph = self.create_index_note(rewrite_as_links, shard_index, graph)
+
+    with stats.stage('render'):
+      return self.render_notes(rewrite_as_links, render_frontmatter, graph)
@@ -0,0 +1,358 @@
+"""
+Watch mode: keeps the loaded notes and their link graph in memory and re-renders only the notes affected by each
+change to the input directory
+"""
+
+import copy
+import logging
+import os
+import time
+
+try:
+  import inotify_simple
+except ImportError:
+  inotify_simple = None
+
+from .backlinker import (Link, Note, backlink, discover_notes, exclude_sections_from_notes, load_notes_from_parameters,
+                         output_folder, output_notes, render_backlinked_notes, render_note, rewrite_links_in_text)
+
+logger = logging.getLogger(__name__)
+
+
+class LiveGraph(object):
+  """
+  The `notes` and `links` built by `backlink`, kept up to date as notes are added and removed.
+  Both operations return the notes whose rendering may have changed as a result
+  """
+
+  def __init__(self, notes_list):
+    self.notes, self.links = backlink(notes_list)
+    self.by_path = {note.path: note for note in notes_list}
+    self.owners = {other_title: note.title for note in notes_list for other_title in note.other_titles}
+
+  def is_placeholder(self, note):
+    # placeholders are created for links without a note and have no file of their own
+    return self.by_path.get(note.path, None) is not note
+
+  def _destination(self, title):
+    if title in self.notes:
+      return self.notes[title]
+
+    if title in self.owners:
+      return self.notes[self.owners[title]]
+
+    placeholder = Note(f"{title}.md")
+    placeholder.title = title
+    self.notes[title] = placeholder
+    return placeholder
+
+  def _retarget(self, titles, affected):
+    # links to these titles may now lead elsewhere, which changes how their sources render
+    for title in titles:
+      if title in self.links:
+        link = self.links[title]
+        link.destination = self._destination(title)
+        affected.update(link.sources)
+        affected.add(link.destination)
+
+  def add(self, note):
+    existing = self.notes.get(note.title, None)
+    if existing is not None and not self.is_placeholder(existing):
+      raise ValueError(f'note title \'{note.title}\' occurs more than once')
+    for other_title in note.other_titles:
+      if other_title in self.owners:
+        raise ValueError(f'note other title \'{other_title}\' occurs more than once')
+
+    # a real note replaces any placeholder for its titles
+    for title in [note.title, *note.other_titles]:
+      if title in self.notes and self.is_placeholder(self.notes[title]):
+        del self.notes[title]
+
+    self.notes[note.title] = note
+    self.by_path[note.path] = note
+    for other_title in note.other_titles:
+      self.owners[other_title] = note.title
+
+    affected = {note}
+    self._retarget([note.title, *note.other_titles], affected)
+
+    for title in note.find_links():
+      if title not in self.links:
+        self.links[title] = Link(title)
+        self.links[title].destination = self._destination(title)
+
+      link = self.links[title]
+      link.sources.add(note)
+      affected.add(link.destination)
+
+    return affected
+
+  def remove(self, path):
+    note = self.by_path[path]
+
+    affected = set()
+    for title in note.find_links():
+      link = self.links[title]
+      link.sources.discard(note)
+      affected.add(link.destination)
+
+      if len(link.sources) == 0:
+        del self.links[title]
+        if self.notes.get(title, None) is link.destination and self.is_placeholder(link.destination):
+          del self.notes[title]
+
+    # only now, so that a link from the note to itself does not take it for a placeholder
+    del self.by_path[path]
+    del self.notes[note.title]
+    for other_title in note.other_titles:
+      del self.owners[other_title]
+
+    self._retarget([note.title, *note.other_titles], affected)
+
+    # the note itself is gone, nothing left to render for it
+    affected.discard(note)
+    return affected
+
+  def render(self, note, rewrite_as_links, render_frontmatter):
+    """
+    Renders `note` as a full run would, without rewriting the content held in the graph
+    """
+    view = copy.copy(note)
+    links_in_note = {title: self.links[title] for title in note.find_links() if title in self.links}
+    view.content = rewrite_links_in_text(note.content, links_in_note, rewrite_as_links, note.path)
+
+    link = self.links.get(note.title, None)
+    other_title_links = [self.links[title] for title in note.other_titles if title in self.links]
+
+    return render_note(view, link, other_title_links, rewrite_as_links, render_frontmatter)
+
+  def is_current(self, note):
+    return self.notes.get(note.title, None) is note
+
+
+def scan_notes(input_dir, output_dir=None):
+  """
+  Returns the `(mtime, size)` of each `*.md` note in `input_dir` and its folders other than `output_dir`, keyed by path
+  """
+  return {path: (stat.st_mtime_ns, stat.st_size) for path, stat in discover_notes(input_dir, output_dir=output_dir)}
+
+
+class PollingWatcher(object):
+
+  name = 'polling'
+
+  def __init__(self, input_dir, interval, output_dir=None):
+    self.input_dir = input_dir
+    self.output_dir = output_dir
+    self.interval = interval
+    self.signatures = scan_notes(input_dir, output_dir)
+
+  def wait(self):
+    time.sleep(self.interval)
+
+    signatures = scan_notes(self.input_dir, self.output_dir)
+    changed = set(signatures.keys()).symmetric_difference(self.signatures.keys())
+    changed.update(name for name, signature in signatures.items() if self.signatures.get(name, signature) != signature)
+    self.signatures = signatures
+
+    return changed
+
+
+class InotifyWatcher(object):
+
+  name = 'inotify'
+
+  def __init__(self, input_dir, interval, output_dir=None):
+    self.inotify = inotify_simple.INotify()
+    self.input_dir = input_dir
+    # our own output is not watched when it is written inside the input directory
+    self.skipped = output_folder(input_dir, output_dir)
+    self.interval = interval
+    # inotify watches a single directory, so every folder of the vault gets a watch of its own
+    self.folders = dict()
+    self._watch_tree('')
+
+  def _watch_tree(self, folder):
+    """
+    Watches `folder` and every folder below it, returning the paths of the notes already in them
+    """
+    flags = inotify_simple.flags
+    mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE | flags.CREATE
+
+    notes = []
+    for root, dirs, files in os.walk(os.path.join(self.input_dir, folder)):
+      relative = os.path.relpath(root, self.input_dir).replace(os.sep, '/')
+      if relative == self.skipped:
+        dirs[:] = []
+        continue
+
+      relative = '' if relative == '.' else relative
+      dirs[:] = [name for name in dirs if not name.startswith('.')]
+      self.folders[self.inotify.add_watch(root, mask)] = relative
+      notes.extend(name if relative == '' else f"{relative}/{name}" for name in files
+                   if name.endswith('.md') and not name.startswith('.'))
+
+    return notes
+
+  def _unwatch_tree(self, folder):
+    # a folder moved out of the vault keeps its watches, which would report its notes under their old paths
+    for wd, watched in list(self.folders.items()):
+      if watched == folder or watched.startswith(f"{folder}/"):
+        del self.folders[wd]
+        try:
+          self.inotify.rm_watch(wd)
+        except OSError:
+          pass
+
+  def wait(self):
+    flags = inotify_simple.flags
+
+    # a short read delay gathers the events of a save that touches several files into one update
+    events = self.inotify.read(timeout=int(self.interval * 1000), read_delay=20)
+
+    names = set()
+    for event in events:
+      if event.mask & flags.IGNORED:
+        self.folders.pop(event.wd, None)
+        continue
+
+      folder = self.folders.get(event.wd, None)
+      if folder is None or event.name.startswith('.'):
+        continue
+
+      path = event.name if folder == '' else f"{folder}/{event.name}"
+      if event.mask & flags.ISDIR:
+        if event.mask & (flags.CREATE | flags.MOVED_TO):
+          # notes moved in with the folder, or written before it was watched, have no events of their own
+          names.update(self._watch_tree(path))
+        elif event.mask & (flags.MOVED_FROM | flags.DELETE):
+          self._unwatch_tree(path)
+          names.add(f"{path}/")
+      elif event.name.endswith('.md') and not event.mask & flags.CREATE:
+        # a created note is picked up once it has been written
+        names.add(path)
+
+    return names
+
+
+def start_watcher(input_dir, interval, output_dir=None):
+  """
+  Returns a watcher for changes to the notes in `input_dir` other than `output_dir`, using inotify where available
+  and polling otherwise
+  """
+  watcher_class = InotifyWatcher if inotify_simple else PollingWatcher
+  return watcher_class(input_dir, interval, output_dir)
+
+
+def _is_same_note(a, b):
+  return (a.title, a.other_titles, a.frontmatter, a.content) == (b.title, b.other_titles, b.frontmatter, b.content)
+
+
+def _expand_folders(graph, names):
+  # a name ending in `/` is a folder gone from the vault, which takes the notes below it along
+  expanded = set(name for name in names if not name.endswith('/'))
+  folders = tuple(name for name in names if name.endswith('/'))
+  if len(folders) > 0:
+    expanded.update(path for path in graph.by_path if path.startswith(folders))
+
+  return expanded
+
+
+def apply_changes(graph, input_dir, names, exclusions):
+  """
+  Reloads the notes `names` from `input_dir` into `graph`, returning the notes whose rendering may have changed.
+  Names ending in `/` are folders that were removed, along with every note below them
+  """
+  names = _expand_folders(graph, names)
+  exists = {name: os.path.exists(os.path.join(input_dir, name)) for name in names}
+
+  affected = set()
+  # removals go first, so a note moved to another path does not clash with itself
+  for name in sorted(names, key=lambda name: (exists[name], name)):
+    old = graph.by_path.get(name, None)
+
+    if not exists[name]:
+      if old is not None:
+        logger.info('Removing %s', name)
+        affected.update(graph.remove(name))
+      continue
+
+    note = Note(name)
+    try:
+      note.load(input_dir)
+    except (OSError, IndexError, ValueError) as e:
+      # a note caught mid-write may not decode yet, its next change event loads it again
+      logger.warning('Unable to load %s, ignoring: %s', name, e)
+      continue
+
+    exclude_sections_from_notes([note], exclusions)
+
+    # our own writes and saves without changes come back as events too
+    if old is not None and _is_same_note(old, note):
+      continue
+
+    logger.info('Reloading %s', name)
+    if old is not None:
+      affected.update(graph.remove(name))
+
+    try:
+      affected.update(graph.add(note))
+    except ValueError as e:
+      logger.warning('Ignoring %s: %s', name, e)
+      if old is not None:
+        affected.update(graph.add(old))
+
+  return affected
+
+
+def _render_all(graph, parameters):
+  if len(parameters['exclude']) > 0 or parameters['render_index']:
+    # exclusion and the index depend on the whole vault, render from copies so the graph stays untouched
+    notes_list = [copy.copy(note) for _, note in sorted(graph.by_path.items())]
+    return render_backlinked_notes(notes_list, parameters)
+
+  return {note.path: graph.render(note, parameters['rewrite_as_links'], parameters['render_frontmatter'])
+          for note in graph.notes.values()}
+
+
+def _render_affected(graph, affected, parameters):
+  if len(parameters['exclude']) > 0 or parameters['render_index']:
+    return _render_all(graph, parameters)
+
+  return {note.path: graph.render(note, parameters['rewrite_as_links'], parameters['render_frontmatter'])
+          for note in affected if graph.is_current(note)}
+
+
+def watch(parameters):
+  """
+  Renders the vault once, then watches the input directory and re-renders the notes affected by each change
+  until interrupted
+  """
+  input_dir = parameters['input']
+  output_dir = parameters['output']
+  jobs = parameters.get('jobs', 1)
+  fsync = parameters.get('fsync', False)
+
+  graph = LiveGraph(load_notes_from_parameters(parameters))
+  output_notes(_render_all(graph, parameters), output_dir, jobs, fsync)
+
+  interval = parameters.get('watch_interval', 0.5)
+  watcher = start_watcher(input_dir, interval, output_dir)
+  logger.info('Watching %s for changes (%s)', input_dir, watcher.name)
+
+  try:
+    while True:
+      names = watcher.wait()
+      if len(names) == 0:
+        continue
+
+      started = time.perf_counter()
+      affected = apply_changes(graph, input_dir, names, parameters['exclude'])
+      if len(affected) == 0:
+        continue
+
+      rendered_notes = _render_affected(graph, affected, parameters)
+      output_notes(rendered_notes, output_dir, jobs, fsync)
+      logger.info('Updated %d notes in %.0fms', len(rendered_notes), (time.perf_counter() - started) * 1000)
+  except KeyboardInterrupt:
+    pass
@@ -0,0 +1,85 @@
+"""
+Measures the memory held per note and per link after loading, backlinking and freezing a synthetic vault, and writes
+the results as JSON
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+
+from backlinker.backlinker import backlink, freeze_links, load_notes
+from backlinker.synthetic import generate_vault
+
+
+def _traced():
+  gc.collect()
+  return tracemalloc.get_traced_memory()[0]
+
+
+def bench(size, work_dir):
+  input_dir = os.path.join(work_dir, f'input-{size}')
+  generate_vault(input_dir, notes=size)
+
+  tracemalloc.start()
+  try:
+    started = _traced()
+    notes_list = load_notes(input_dir)
+    for note in notes_list:
+      note.find_links()
+    loaded = _traced()
+
+    notes, links = backlink(notes_list)
+    backlinked = _traced()
+
+    freeze_links(links)
+    frozen = _traced()
+  finally:
+    tracemalloc.stop()
+
+  content_bytes = sum(sys.getsizeof(note.content) for note in notes_list)
+
+  return {
+      'notes': len(notes_list),
+      'links': len(links),
+      'sources': sum(len(link.sources) for link in links.values()),
+      'bytes_per_note': (loaded - started) / len(notes_list),
+      'bytes_per_note_excluding_content': (loaded - started - content_bytes) / len(notes_list),
+      'bytes_per_link': (backlinked - loaded) / len(links),
+      'bytes_per_frozen_link': (frozen - loaded) / len(links)
+  }
+
+
+def argument_parser():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                      help='vault sizes in notes to benchmark (default 1000 10000 100000)')
+  parser.add_argument('--results', type=str, default='bench_memory_results.json', help='file to write JSON results to')
+  parser.add_argument('--work-dir', type=str, help='directory for generated vaults (default a temporary directory)')
+  return parser
+
+
+def main():
+  args = argument_parser().parse_args()
+
+  results = []
+  with tempfile.TemporaryDirectory() as temp_dir:
+    work_dir = args.work_dir or temp_dir
+    for size in args.sizes:
+      result = bench(size, work_dir)
+      results.append(result)
+      print(f"{size} notes: {result['bytes_per_note']:.0f} bytes per note "
+            f"({result['bytes_per_note_excluding_content']:.0f} excluding content), "
+            f"{result['bytes_per_link']:.0f} bytes per link, {result['bytes_per_frozen_link']:.0f} frozen",
+            file=sys.stderr)
+
+  with open(args.results, 'w') as f:
+    json.dump({'python': platform.python_version(), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,91 @@
+"""
+Times each stage of a backlinker run on synthetic vaults of increasing size and writes the results as JSON
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from backlinker.backlinker import (backlink, create_index_notes, exclude_notes, exclude_sections_from_notes, load_notes,
+                                   output_notes, render_links_in_content, render_notes)
+from backlinker.synthetic import SECTION_LABEL, generate_vault
+
+
+@contextlib.contextmanager
+def _timed(timings, stage):
+  started = time.perf_counter()
+  with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    yield
+  timings[stage] = time.perf_counter() - started
+
+
+def bench(size, work_dir, rewrite_as_links):
+  input_dir = os.path.join(work_dir, f'input-{size}')
+  output_dir = os.path.join(work_dir, f'output-{size}')
+  os.makedirs(output_dir, exist_ok=True)
+
+  generate_vault(input_dir, notes=size)
+
+  exclusions = [SECTION_LABEL]
+  timings = dict()
+
+  with _timed(timings, 'load'):
+    notes_list = load_notes(input_dir)
+  with _timed(timings, 'exclude_sections'):
+    exclude_sections_from_notes(notes_list, exclusions)
+  with _timed(timings, 'backlink'):
+    graph = backlink(notes_list)
+  with _timed(timings, 'exclude_notes'):
+    graph = exclude_notes(graph.notes, graph.links, exclusions, graph.index)
+  notes, links = graph
+  with _timed(timings, 'render_links_in_content'):
+    render_links_in_content(links.values(), rewrite_as_links)
+  with _timed(timings, 'create_index_note'):
+    create_index_notes(notes, rewrite_as_links)
+  with _timed(timings, 'render_notes'):
+    rendered_notes = render_notes(notes, links, rewrite_as_links, True, graph.aliases)
+  with _timed(timings, 'output_notes'):
+    output_notes(rendered_notes, output_dir)
+
+  return {
+      'notes': size,
+      'rendered_notes': len(rendered_notes),
+      'links': len(links),
+      'seconds': timings,
+      'total_seconds': sum(timings.values())
+  }
+
+
+def argument_parser():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                      help='vault sizes in notes to benchmark (default 1000 10000 100000)')
+  parser.add_argument('--results', type=str, default='bench_results.json', help='file to write JSON results to')
+  parser.add_argument('--rewrite-as-links', action='store_true', help='benchmark rewriting as [Link](Link.md) links')
+  parser.add_argument('--work-dir', type=str, help='directory for generated vaults (default a temporary directory)')
+  return parser
+
+
+def main():
+  args = argument_parser().parse_args()
+
+  results = []
+  with tempfile.TemporaryDirectory() as temp_dir:
+    work_dir = args.work_dir or temp_dir
+    for size in args.sizes:
+      result = bench(size, work_dir, args.rewrite_as_links)
+      results.append(result)
+      stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result['seconds'].items())
+      print(f"{size} notes: {stages}", file=sys.stderr)
+
+  with open(args.results, 'w') as f:
+    json.dump({'python': platform.python_version(), 'rewrite_as_links': args.rewrite_as_links, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+  main()
@@ -18,4 +18,8 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.6',
+    extras_require={
+        # serve mode watches the notes with inotify on Linux, and polls for changes without it
+        'watch': ['inotify_simple; sys_platform == "linux"'],
+    },
 )